@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 import numpy as np
-import pandas as pd
-from scipy.stats import linregress
 from typing import Any, Tuple, Optional, Dict
 
 # -----------------------------------------------------------------------------
@@ -9,24 +7,44 @@ from typing import Any, Tuple, Optional, Dict
 # -----------------------------------------------------------------------------
 
 
+def _linear_fit(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """
+    最小二乗法で y = a*x + b を当てはめ、(傾き a, 決定係数 R^2) を返します。
+
+    scipy.stats.linregress と同じ値を返しますが、p値や標準誤差は計算しません。
+    x がすべて同じ値の場合は ValueError を送出します。
+    """
+    dx = x - x.mean()
+    dy = y - y.mean()
+    sxx = np.dot(dx, dx)
+    if sxx == 0:
+        raise ValueError("x がすべて同じ値のため線形回帰できません。")
+    sxy = np.dot(dx, dy)
+    syy = np.dot(dy, dy)
+    r2 = sxy * sxy / (sxx * syy) if syy != 0 else 0.0
+    return float(sxy / sxx), float(min(r2, 1.0))
+
+
 def find_demag_slope_auto(H_data, M_data, segment_ratio=0.15, min_r_squared=0.99):
     """M-Hカーブ両端から線形性の高い領域を自動検出し、反磁性補正の傾きを計算"""
-    df = (
-        pd.DataFrame({"H": H_data, "M": M_data})
-        .sort_values(by="H")
-        .reset_index(drop=True)
-    )
-    n_points = len(df)
+    H_data = np.asarray(H_data, dtype=float)
+    M_data = np.asarray(M_data, dtype=float)
+    n_points = len(H_data)
     segment_size = max(5, int(n_points * segment_ratio))
 
     if n_points < segment_size * 2:
         print("  警告: データ点数不足のため、傾きの自動検出をスキップ。")
         return 0, 0, 0
 
+    # 両端 segment_size 点を選べればよく、区間内の並びはフィットに影響しないため
+    # 全体を整列せず部分選択で済ませる
+    part = np.argpartition(H_data, (segment_size - 1, n_points - segment_size))
+    neg_idx = part[:segment_size]
+    pos_idx = part[-segment_size:]
+
     slope_pos, r2_pos = 0, 0
     try:
-        res_pos = linregress(df.tail(segment_size)["H"], df.tail(segment_size)["M"])
-        slope_pos, r2_pos = res_pos.slope, res_pos.rvalue**2
+        slope_pos, r2_pos = _linear_fit(H_data[pos_idx], M_data[pos_idx])
         if r2_pos < min_r_squared:
             print(f"  警告: 正磁場側の線形性が低い (R^2 = {r2_pos:.4f})。")
     except (ValueError, np.linalg.LinAlgError):
@@ -34,8 +52,7 @@ def find_demag_slope_auto(H_data, M_data, segment_ratio=0.15, min_r_squared=0.99
 
     slope_neg, r2_neg = 0, 0
     try:
-        res_neg = linregress(df.head(segment_size)["H"], df.head(segment_size)["M"])
-        slope_neg, r2_neg = res_neg.slope, res_neg.rvalue**2
+        slope_neg, r2_neg = _linear_fit(H_data[neg_idx], M_data[neg_idx])
         if r2_neg < min_r_squared:
             print(f"  警告: 負磁場側の線形性が低い (R^2 = {r2_neg:.4f})。")
     except (ValueError, np.linalg.LinAlgError):
@@ -62,19 +79,19 @@ def find_demag_slope_manual(
     Returns:
         Tuple[float, float, float]: (計算された平均の傾き, 正磁場側のR^2, 負磁場側のR^2)。
     """
-    df = pd.DataFrame({"H": H_data, "M": M_data})
+    H_data = np.asarray(H_data, dtype=float)
+    M_data = np.asarray(M_data, dtype=float)
     slope_pos, r2_pos = 0, 0
     try:
-        pos_mask = (df["H"] >= pos_range[0]) & (df["H"] <= pos_range[1])
-        num_pos = pos_mask.sum()
+        pos_mask = (H_data >= pos_range[0]) & (H_data <= pos_range[1])
+        num_pos = int(np.count_nonzero(pos_mask))
         print(
             f"  手動(正): H=[{pos_range[0]:.2f}, {pos_range[1]:.2f}] T, 点数: {num_pos}"
         )
         if num_pos >= 2:
             if num_pos < 5:
                 print(f"  警告: 正磁場範囲のデータ点数僅少({num_pos}点)。")
-            res_pos = linregress(df.loc[pos_mask, "H"], df.loc[pos_mask, "M"])
-            slope_pos, r2_pos = res_pos.slope, res_pos.rvalue**2
+            slope_pos, r2_pos = _linear_fit(H_data[pos_mask], M_data[pos_mask])
         else:
             print("  エラー: 正磁場範囲のデータ点が2点未満。")
     except (ValueError, np.linalg.LinAlgError) as e:
@@ -82,16 +99,15 @@ def find_demag_slope_manual(
 
     slope_neg, r2_neg = 0, 0
     try:
-        neg_mask = (df["H"] >= neg_range[0]) & (df["H"] <= neg_range[1])
-        num_neg = neg_mask.sum()
+        neg_mask = (H_data >= neg_range[0]) & (H_data <= neg_range[1])
+        num_neg = int(np.count_nonzero(neg_mask))
         print(
             f"  手動(負): H=[{neg_range[0]:.2f}, {neg_range[1]:.2f}] T, 点数: {num_neg}"
         )
         if num_neg >= 2:
             if num_neg < 5:
                 print(f"  警告: 負磁場範囲のデータ点数僅少({num_neg}点)。")
-            res_neg = linregress(df.loc[neg_mask, "H"], df.loc[neg_mask, "M"])
-            slope_neg, r2_neg = res_neg.slope, res_neg.rvalue**2
+            slope_neg, r2_neg = _linear_fit(H_data[neg_mask], M_data[neg_mask])
         else:
             print("  エラー: 負磁場範囲のデータ点が2点未満。")
     except (ValueError, np.linalg.LinAlgError) as e:
@@ -109,8 +125,37 @@ def find_demag_slope_manual(
         return 0, 0, 0
 
 
+def subtract_background(
+    H: Any, M: Any, slope: float, offset: float = 0.0
+) -> np.ndarray:
+    """
+    反磁性の傾きとオフセットを差し引いた M - slope*H - offset を返します。
+
+    結果用の配列を1つだけ確保し、以降は in-place で演算します。
+
+    Args:
+        H (Any): 磁場データ。
+        M (Any): 磁化データ。
+        slope (float): 差し引く反磁性の傾き。
+        offset (float, optional): 差し引く定数オフセット。デフォルトは0。
+
+    Returns:
+        np.ndarray: 補正後の磁化データ。
+    """
+    M_corrected = np.multiply(H, -slope, dtype=float)
+    M_corrected += M
+    if offset:
+        M_corrected -= offset
+    return M_corrected
+
+
 def antisymmetrize_loop(
-    H_down: Any, M_down: Any, H_up: Any, M_up: Any
+    H_down: Any,
+    M_down: Any,
+    H_up: Any,
+    M_up: Any,
+    order_down: Optional[np.ndarray] = None,
+    order_up: Optional[np.ndarray] = None,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     M-H ループを反対称化し、原点対称 M_down(H) = -M_up(-H) を厳密に満たすよう補正します。
@@ -131,6 +176,8 @@ def antisymmetrize_loop(
         M_down: 往路の磁化データ。
         H_up:   復路（昇磁場）の磁場データ。
         M_up:   復路の磁化データ。
+        order_down: H_down を昇順に並べるインデックス（省略時は内部で計算）。
+        order_up:   H_up を昇順に並べるインデックス（省略時は内部で計算）。
 
     Returns:
         Tuple[np.ndarray, np.ndarray]: 反対称化後の (M_down_as, M_up_as)。
@@ -141,8 +188,8 @@ def antisymmetrize_loop(
     M_up = np.asarray(M_up, dtype=float)
 
     # np.interp は x が昇順である必要があるため、各枝を H 昇順に並べ替えてから補間する
-    du = np.argsort(H_up)
-    dd = np.argsort(H_down)
+    du = order_up if order_up is not None else np.argsort(H_up, kind="stable")
+    dd = order_down if order_down is not None else np.argsort(H_down, kind="stable")
 
     def M_up_at(x):
         return np.interp(x, H_up[du], M_up[du])
@@ -171,8 +218,9 @@ def calculate_remanence(
         Optional[float]: 計算された残留磁化の平均値。計算に失敗した場合はNone。
     """
     try:
+        # 往路は H が降順のため、反転コピーの代わりに -H（昇順）上で H=0 を補間する
         Mr_down, Mr_up = (
-            np.interp(0, H_down[::-1], M_down[::-1]),
+            np.interp(0, np.negative(H_down), M_down),
             np.interp(0, H_up, M_up),
         )
         Mr_avg = (abs(Mr_down) + abs(Mr_up)) / 2
@@ -203,8 +251,9 @@ def calculate_coercivity(
                                  Heb = (Hc_down + Hc_up) / 2。対称ループなら 0。
     """
     try:
+        # 往路は M が降順のため、反転コピーの代わりに -M（昇順）上で M=0 を補間する
         Hc_down, Hc_up = (
-            float(np.interp(0, M_down[::-1], H_down[::-1])),
+            float(np.interp(0, np.negative(M_down), H_down)),
             float(np.interp(0, M_up, H_up)),
         )
         Hc_avg = (abs(Hc_down) + abs(Hc_up)) / 2
@@ -241,7 +290,8 @@ def calculate_saturation_magnetization(
     Returns:
         Dict[str, float]: 'avg', 'pos', 'neg' をキーとする飽和磁化の計算結果辞書。
     """
-    H, M = np.array(H), np.array(M)
+    H = np.ascontiguousarray(H, dtype=float)
+    M = np.ascontiguousarray(M, dtype=float)
     Ms_pos, Ms_neg = 0, 0
 
     if pos_range and neg_range:
@@ -249,8 +299,8 @@ def calculate_saturation_magnetization(
         pos_mask = (H >= pos_range[0]) & (H <= pos_range[1])
         neg_mask = (H >= neg_range[0]) & (H <= neg_range[1])
 
-        num_pos = pos_mask.sum()
-        num_neg = neg_mask.sum()
+        num_pos = int(np.count_nonzero(pos_mask))
+        num_neg = int(np.count_nonzero(neg_mask))
         print(
             f"    正磁場範囲 H=[{pos_range[0]:.2f}, {pos_range[1]:.2f}] T, 点数: {num_pos}"
         )
@@ -263,20 +313,19 @@ def calculate_saturation_magnetization(
         if num_neg < 2:
             print(f"    警告: 負磁場範囲のデータ点数僅少({num_neg}点)。")
 
-        if num_pos > 0:
-            Ms_pos = np.mean(M[pos_mask])
-        if num_neg > 0:
-            Ms_neg = np.mean(np.abs(M[neg_mask]))
-
     else:
         # Automatic range calculation
-        H_max, H_min = np.max(H), np.min(H)
+        H_max, H_min = H.max(), H.min()
         pos_mask = H > H_max * 0.9
         neg_mask = H < H_min * 0.9
-        if np.any(pos_mask):
-            Ms_pos = np.mean(M[pos_mask])
-        if np.any(neg_mask):
-            Ms_neg = np.mean(np.abs(M[neg_mask]))
+        num_pos = int(np.count_nonzero(pos_mask))
+        num_neg = int(np.count_nonzero(neg_mask))
+
+    # マスク部分をコピーせず、where 指定で平均を取る
+    if num_pos > 0:
+        Ms_pos = float(np.mean(M, where=pos_mask))
+    if num_neg > 0:
+        Ms_neg = float(np.mean(np.abs(M), where=neg_mask))
 
     if Ms_pos != 0 and Ms_neg != 0:
         Ms_avg = (Ms_pos + Ms_neg) / 2
@@ -297,6 +346,8 @@ def calculate_saturation_field(
     Ms: float,
     tolerance_pct: float = 2.0,
     min_consecutive: int = 3,
+    order_down: Optional[np.ndarray] = None,
+    order_up: Optional[np.ndarray] = None,
 ) -> Optional[Dict[str, float]]:
     """
     飽和磁場(Hs)を計算します。
@@ -317,6 +368,8 @@ def calculate_saturation_field(
         Ms: 飽和磁化 (kA/m)
         tolerance_pct: 許容誤差 (%)。Ms*(1-tolerance_pct/100) を閾値とする
         min_consecutive: 連続して閾値以下である必要な最小点数
+        order_down: H_down を昇順に並べるインデックス（省略時は内部で計算）
+        order_up: H_up を昇順に並べるインデックス（省略時は内部で計算）
 
     Returns:
         {'T', 'Oe', 'pos', 'neg'} をキーとする辞書。計算失敗時は None。
@@ -326,29 +379,22 @@ def calculate_saturation_field(
 
     threshold = (1.0 - tolerance_pct / 100.0) * Ms
 
-    def _find_hs_branch(H_branch: np.ndarray, M_branch: np.ndarray) -> Optional[float]:
-        abs_H = np.abs(H_branch)
-        sort_idx = np.argsort(abs_H)
-        abs_H_sorted = abs_H[sort_idx]
-        abs_M_sorted = np.abs(M_branch[sort_idx])
-
+    def _find_hs_branch(
+        abs_H_sorted: np.ndarray, abs_M_sorted: np.ndarray
+    ) -> Optional[float]:
         n = len(abs_H_sorted)
         if n < min_consecutive:
             return None
 
         below = abs_M_sorted < threshold
 
-        # |H|昇順に走査し、連続 min_consecutive 点以上の below-threshold ランの
-        # 最後のもの（最も高|H|側）の末端インデックスを記録する
-        last_run_end = -1
-        run_len = 0
-        for i in range(n):
-            if below[i]:
-                run_len += 1
-                if run_len >= min_consecutive:
-                    last_run_end = i
-            else:
-                run_len = 0
+        # |H|昇順で、連続 min_consecutive 点以上の below-threshold ランのうち
+        # 最後のもの（最も高|H|側）の末端インデックスを求める。
+        # 長さ k の窓の below 点数を累積和の差で一度に数え、全点 below の窓の末端を取る
+        k = max(min_consecutive, 1)
+        counts = np.concatenate(([0], np.cumsum(below)))
+        full = np.flatnonzero(counts[k:] - counts[:-k] == k)
+        last_run_end = int(full[-1]) + k - 1 if full.size else -1
 
         if last_run_end == -1:
             # 連続した below-threshold ランなし → 最低磁場から飽和とみなす
@@ -367,17 +413,22 @@ def calculate_saturation_field(
         H_up_np = np.asarray(H_up, dtype=float)
         M_up_np = np.asarray(M_up, dtype=float)
 
-        # 正側: 降磁場ブランチの H > 0 領域
-        pos_mask = H_down_np > 0
+        if order_down is None:
+            order_down = np.argsort(H_down_np, kind="stable")
+        if order_up is None:
+            order_up = np.argsort(H_up_np, kind="stable")
+
+        # 正側: 降磁場ブランチの H > 0 領域（H 昇順 = |H| 昇順）
+        pos_idx = order_down[H_down_np[order_down] > 0]
         Hs_pos: Optional[float] = None
-        if np.sum(pos_mask) >= min_consecutive:
-            Hs_pos = _find_hs_branch(H_down_np[pos_mask], M_down_np[pos_mask])
+        if len(pos_idx) >= min_consecutive:
+            Hs_pos = _find_hs_branch(H_down_np[pos_idx], np.abs(M_down_np[pos_idx]))
 
-        # 負側: 昇磁場ブランチの H < 0 領域
-        neg_mask = H_up_np < 0
+        # 負側: 昇磁場ブランチの H < 0 領域（H 降順 = |H| 昇順）
+        neg_idx = order_up[H_up_np[order_up] < 0][::-1]
         Hs_neg: Optional[float] = None
-        if np.sum(neg_mask) >= min_consecutive:
-            Hs_neg = _find_hs_branch(H_up_np[neg_mask], M_up_np[neg_mask])
+        if len(neg_idx) >= min_consecutive:
+            Hs_neg = _find_hs_branch(-H_up_np[neg_idx], np.abs(M_up_np[neg_idx]))
 
         if Hs_pos is not None and Hs_neg is not None:
             Hs_avg = (Hs_pos + Hs_neg) / 2.0
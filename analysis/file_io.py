@@ -1,7 +1,90 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
+import codecs
+import functools
+import io
+import re
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Union
+
+import numpy as np
+
+# pandas の import はバックエンド起動時間の大半を占めるため、実際にファイルを読むまで遅らせる
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# ヘッダー検出のために読む先頭バイト数。データヘッダーは通常 40 行目付近にある
+_HEAD_BYTES = 32768
+
+
+# 解析に必要なデータ列
+_DATA_COLUMNS = ("H(Oe)", "M(emu)")
+
+
+# メタデータ行 'key=,value[,...]' にマッチする。key は最初の '=' まで、value は次の ',' まで
+_META_RE = re.compile(r"^[^\S\n]*([^=\n]*?)[^\S\n]*=,([^,\n]*)", re.MULTILINE)
+
+
+def _read_head(file_path: Union[str, Path]) -> bytes:
+    """ファイル先頭 _HEAD_BYTES バイトを返す。読めなければ空バイト列。"""
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(_HEAD_BYTES)
+    except IOError:
+        return b""
+
+
+def _find_header(head: bytes) -> Optional[Tuple[int, int]]:
+    """
+    'H(Oe)' と 'M(emu)' を含む最初の行の (行番号, 行頭のバイト位置) を返す (先頭 102 行のみ探索)。
+
+    行ごとに Python でループせず、'H(Oe)' の出現位置を bytes.find で直接探し、
+    その行に 'M(emu)' があるかを確かめる。行番号は見つかった行より前の改行数から求める
+    (splitlines と同じく '\n', '\r', '\r\n' を 1 つの改行として数える)。
+    """
+    pos = head.find(b"H(Oe)")
+    while pos != -1:
+        start = max(head.rfind(b"\n", 0, pos), head.rfind(b"\r", 0, pos)) + 1
+        ends = [e for e in (head.find(b"\n", pos), head.find(b"\r", pos)) if e != -1]
+        end = min(ends) if ends else len(head)
+        if head.find(b"M(emu)", start, end) != -1:
+            row = head.count(b"\n", 0, start) + head.count(b"\r", 0, start) - head.count(b"\r\n", 0, start)
+            return (row, start) if row < 102 else None
+        pos = head.find(b"H(Oe)", end)
+    return None
+
+
+def _detect_encoding(lines: List[bytes]) -> str:
+    """
+    ヘッダー部の行から文字コードを一度だけ判定する。
+
+    UTF-8 の BOM があれば UTF-8 (BOM 付き)、ASCII のみなら Shift-JIS とし、
+    それ以外は UTF-8 として厳密に検証できれば UTF-8、だめなら Shift-JIS とみなす。
+    Shift-JIS のリード/トレイルバイトは UTF-8 としてまず通らない一方、UTF-8 の日本語は
+    Shift-JIS として (文字化けしたまま) 復号できてしまうことがあるため、UTF-8 を先に試す。
+    どちらとしても復号できない場合は従来どおり UTF-8 とする。
+    """
+    if lines and lines[0].startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    text = b"".join(lines)
+    if text.isascii():
+        return "shift-jis"
+    for encoding in ("utf-8", "shift-jis"):
+        try:
+            text.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            pass
+    return "utf-8"
+
+
+def _parse_metadata_lines(lines: List[bytes], encoding: str) -> Dict[str, str]:
+    """先頭 41 行の 'key=,value' 形式の行からメタデータを抽出する。"""
+    text = b"\n".join(line.rstrip(b"\r\n") for line in lines[:41]).decode(
+        encoding, errors="replace"
+    )
+    pairs = ((m.group(1).strip(), m.group(2).strip()) for m in _META_RE.finditer(text))
+    return {key: value for key, value in pairs if key and value}
 
 
 def find_header_row(file_path: Union[str, Path], default_row: int = 40) -> int:
@@ -9,6 +92,9 @@ def find_header_row(file_path: Union[str, Path], default_row: int = 40) -> int:
     ファイル内のデータヘッダー行を自動的に検出します。
     'H(Oe)'と'M(emu)'を含む行を探し、その行番号（0-indexed）を返します。
 
+    マーカーはどちらも ASCII のため、Shift-JIS / UTF-8 を問わず先頭をバイト列のまま
+    照合します（デコードやエンコーディングの試行は行わない）。
+
     Args:
         file_path (Union[str, Path]): 対象ファイルのパス。
         default_row (int, optional): 見つからなかった場合に使用するデフォルト行番号。デフォルトは40。
@@ -16,18 +102,11 @@ def find_header_row(file_path: Union[str, Path], default_row: int = 40) -> int:
     Returns:
         int: 検出されたヘッダー行のインデックス。
     """
-    encodings_to_try = ["shift-jis", "utf-8"]
-    for encoding in encodings_to_try:
-        try:
-            with open(file_path, "r", encoding=encoding) as f:
-                for i, line in enumerate(f):
-                    if "H(Oe)" in line and "M(emu)" in line:
-                        print(f"  情報: ヘッダーを {i + 1} 行目で検出。")
-                        return i
-                    if i > 100:
-                        break
-        except (UnicodeDecodeError, IOError):
-            continue
+    found = _find_header(_read_head(file_path))
+    if found is not None:
+        header_row = found[0]
+        print(f"  情報: ヘッダーを {header_row + 1} 行目で検出。")
+        return header_row
 
     print(
         f"  警告: ヘッダー行を自動検出できず。デフォルト値({default_row + 1}行目)を使用。"
@@ -45,41 +124,134 @@ def parse_metadata(file_path: Union[str, Path]) -> Dict[str, str]:
     Returns:
         Dict[str, str]: 抽出されたメタデータの辞書。
     """
-    metadata = {}
     try:
-        encodings_to_try = ["shift-jis", "utf-8"]
-        for encoding in encodings_to_try:
-            try:
-                with open(file_path, "r", encoding=encoding) as f:
-                    for i, line in enumerate(f):
-                        if i > 40:
-                            break
-                        try:
-                            line = line.strip()
-                            if "=" in line:
-                                parts = line.split("=", 1)
-                                key = parts[0].strip()
-                                value_part = parts[1]
-                                if value_part.startswith(","):
-                                    value_parts = value_part.split(",")
-                                    if len(value_parts) > 1:
-                                        value = value_parts[1].strip()
-                                        if key and value:
-                                            metadata[key] = value
-                        except IndexError:
-                            continue
-                if metadata:
-                    return metadata
-            except (UnicodeDecodeError, IOError):
-                continue
+        lines = _read_head(file_path).splitlines(keepends=True)[:41]
+        return _parse_metadata_lines(lines, _detect_encoding(lines))
     except Exception as e:
         print(f"  警告: メタデータ読み取り中に予期せぬエラー発生: {e}。")
-    return metadata
+        return {}
+
+
+def load_vsm_bytes(
+    raw: bytes, name: str, default_row: int = 40
+) -> Tuple[Optional["pd.DataFrame"], Dict[str, str], Optional[str]]:
+    """
+    読み込み済みの VSM ファイル内容から、DataFrame とメタデータを一度に取り出します。
+
+    ヘッダー行の検出・メタデータ抽出・データ本体のパースを同じバイト列に対して行うため、
+    ファイルを開き直すことはありません。
+    パラメータ変更のたびに同じ内容が再送されるため、結果は内容をキーにキャッシュします。
+    返される DataFrame はキャッシュと共有されるので、呼び出し側で変更しないでください。
+
+    Args:
+        raw (bytes): ファイルの全内容。
+        name (str): エラーメッセージに使うファイル名。
+        default_row (int, optional): ヘッダー行が見つからなかった場合の行番号。デフォルトは40。
+
+    Returns:
+        Tuple[Optional[pd.DataFrame], Dict[str, str], Optional[str]]:
+            (成功時のDataFrame, メタデータ, エラー発生時のエラーメッセージ文字列)。
+    """
+    df, metadata, error = _parse_vsm_bytes(raw, name, default_row)
+    return df, dict(metadata), error
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_vsm_bytes(
+    raw: bytes, name: str, default_row: int
+) -> Tuple[Optional["pd.DataFrame"], Dict[str, str], Optional[str]]:
+    """load_vsm_bytes の本体（キャッシュ付き）。"""
+    import pandas as pd
+
+    head = raw[:_HEAD_BYTES]
+    lines = head.splitlines(keepends=True)
+
+    found = _find_header(head)
+    if found is not None:
+        header_row, body_start = found
+        print(f"  情報: ヘッダーを {header_row + 1} 行目で検出。")
+    else:
+        print(
+            f"  警告: ヘッダー行を自動検出できず。デフォルト値({default_row + 1}行目)を使用。"
+        )
+        header_row = default_row
+        body_start = sum(len(line) for line in lines[:header_row])
+
+    # 文字コードはメタデータ部とヘッダー行から一度だけ判定し、本体のパースにもそのまま使う
+    encoding = _detect_encoding(lines[: max(header_row + 1, 41)])
+
+    metadata: Dict[str, str] = {}
+    try:
+        metadata = _parse_metadata_lines(lines, encoding)
+    except Exception as e:
+        print(f"  警告: メタデータ読み取り中に予期せぬエラー発生: {e}。")
+
+    # ヘッダー行の先頭からをそのまま pandas に渡す
+    body = raw[body_start:]
+    try:
+        df = pd.read_csv(
+            io.BytesIO(body),
+            encoding=encoding,
+            dtype=dict.fromkeys(_DATA_COLUMNS, "float64"),
+            engine="c",
+        )
+
+        if not set(_DATA_COLUMNS).issubset(df.columns):
+            return (
+                None,
+                metadata,
+                f"ファイル '{name}' に必要な列 ('H(Oe)', 'M(emu)') がありません。",
+            )
+
+        # 欠損のある行は従来どおり全列で判定して除く。H, M だけで判定すると補助列が空の行が
+        # 残り、点数や解析値、セッションに保存された除外点の行番号がずれる
+        df.dropna(inplace=True)
+        return df, metadata, None  # Success
+    except Exception as e:
+        return None, metadata, f"'{name}'の読み込みに失敗しました:\n{e}"
+
+
+def load_vsm_arrays(
+    raw: bytes, name: str, default_row: int = 40
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Dict[str, str], Optional[str]]:
+    """
+    load_vsm_bytes と同様に読み込み、H(Oe) と M(emu) を float64 の ndarray として返します。
+
+    列の取り出しと型変換も内容ごとに一度だけ行い、解析のたびに pandas を経由しません。
+    返される配列はキャッシュと共有されるため書き込み不可にしてあります。
+
+    Args:
+        raw (bytes): ファイルの全内容。
+        name (str): エラーメッセージに使うファイル名。
+        default_row (int, optional): ヘッダー行が見つからなかった場合の行番号。デフォルトは40。
+
+    Returns:
+        Tuple[Optional[np.ndarray], Optional[np.ndarray], Dict[str, str], Optional[str]]:
+            (H(Oe) の配列, M(emu) の配列, メタデータ, エラー発生時のエラーメッセージ文字列)。
+    """
+    H, M, metadata, error = _vsm_arrays(raw, name, default_row)
+    return H, M, dict(metadata), error
+
+
+@functools.lru_cache(maxsize=32)
+def _vsm_arrays(
+    raw: bytes, name: str, default_row: int
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Dict[str, str], Optional[str]]:
+    """load_vsm_arrays の本体（キャッシュ付き）。"""
+    df, metadata, error = _parse_vsm_bytes(raw, name, default_row)
+    if df is None:
+        return None, None, metadata, error
+    # 列は float64 で読み込んでいるので、コピーせずキャッシュ済み DataFrame の列をそのまま参照する
+    H = df["H(Oe)"].to_numpy(dtype=float, copy=False)
+    M = df["M(emu)"].to_numpy(dtype=float, copy=False)
+    H.setflags(write=False)
+    M.setflags(write=False)
+    return H, M, metadata, None
 
 
 def load_vsm_file(
     file_path: Union[str, Path],
-) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+) -> Tuple[Optional["pd.DataFrame"], Optional[str]]:
     """
     一つのVSMファイルを読み込み、DataFrameを返します。
     エラーが発生した場合は、(None, error_message)を返します。
@@ -92,21 +264,10 @@ def load_vsm_file(
             (成功時のDataFrame, エラー発生時のエラーメッセージ文字列)。
     """
     path = Path(file_path)
-    header_row = find_header_row(path)
     try:
-        try:
-            df = pd.read_csv(path, header=header_row, encoding="shift-jis")
-        except UnicodeDecodeError:
-            df = pd.read_csv(path, header=header_row, encoding="utf-8")
-
-        df.dropna(inplace=True)
-
-        if not {"H(Oe)", "M(emu)"}.issubset(df.columns):
-            return (
-                None,
-                f"ファイル '{path.name}' に必要な列 ('H(Oe)', 'M(emu)') がありません。",
-            )
-
-        return df, None  # Success
+        raw = path.read_bytes()
     except Exception as e:
         return None, f"'{path.name}'の読み込みに失敗しました:\n{e}"
+    df, _, error = load_vsm_bytes(raw, path.name)
+    # load_vsm_bytes のキャッシュと共有しないよう、呼び出し側が自由に変更できるコピーを返す
+    return (df.copy() if df is not None else None), error
@@ -1,9 +1,25 @@
+import contextlib
+import threading
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from backend.routers import analysis, session
 
-app = FastAPI(title="VSM Analyzer API")
+
+def _warm_up():
+    """pandas の import を起動直後にバックグラウンドで済ませる。
+    起動自体は遅らせず（import は file_io で遅延させている）、最初のファイル解析で待たせない。"""
+    import pandas  # noqa: F401
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="VSM Analyzer API", lifespan=lifespan)
 
 ALLOWED_ORIGINS = [
     "http://localhost:1420",    # Tauri dev (Vite)
@@ -1,4 +1,4 @@
-import sys, io, contextlib
+import sys, io, contextlib, threading
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -6,7 +6,6 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from analysis import calculations as vsm_logic
 from analysis import file_io
-import tempfile, os
 import json
 import numpy as np
 
@@ -18,8 +17,53 @@ def _r(v, ndigits):
     return round(float(v), ndigits) if v is not None else None
 
 
+class _ThreadLocalStdout(io.TextIOBase):
+    """
+    書き込み先をスレッドごとに切り替えられる sys.stdout の代理。
+
+    contextlib.redirect_stdout はプロセス全体の sys.stdout を差し替えるため、複数ファイルの
+    解析を並行に走らせるとログが混ざる。こちらは _capture_stdout() 中のスレッドの出力だけを
+    そのスレッドのバッファへ送り、それ以外は元の stdout へそのまま流す。
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def write(self, s):
+        target = getattr(self._local, "buffer", None)
+        if target is None:
+            target = self._default
+        # --noconsole ビルドでは元の stdout が None のことがある（print と同様に捨てる）
+        return target.write(s) if target is not None else len(s)
+
+    def flush(self):
+        if self._default is not None:
+            self._default.flush()
+
+
+_stdout_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _capture_stdout():
+    """このスレッドの print 出力だけを StringIO に集める（スレッドセーフ版 redirect_stdout）。"""
+    with _stdout_lock:
+        if not isinstance(sys.stdout, _ThreadLocalStdout):
+            sys.stdout = _ThreadLocalStdout(sys.stdout)
+        proxy = sys.stdout
+    buf = io.StringIO()
+    proxy._local.buffer = buf
+    try:
+        yield buf
+    finally:
+        proxy._local.buffer = None
+
+
+# 同期関数として定義し、FastAPI のスレッドプールで実行させる。フロントエンドは
+# ファイルごとに並行してリクエストするため、複数ファイルの解析が並列に進む
 @router.post("/analyze")
-async def analyze_file(
+def analyze_file(
     file: UploadFile = File(...),
     # グローバル設定
     thickness: float = Form(50.0),
@@ -46,60 +90,52 @@ async def analyze_file(
     # 反対称化: ONで往路/復路を原点対称に補正し、磁場に偶な成分（定数オフセット等）を除去
     antisymmetrize: bool = Form(False),
 ):
-    suffix = Path(file.filename or "data.VSM").suffix
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+    # アップロード内容をメモリ上でそのままパースする（一時ファイルは作らない）
+    H_oe, M_emu, metadata, load_error = file_io.load_vsm_arrays(
+        file.file.read(), file.filename or "data.VSM"
+    )
+    if H_oe is None:
+        raise HTTPException(status_code=422, detail=load_error or "読み込み失敗")
+
+    # ファイル別設定が指定されていればそちらを優先
+    effective_demag_mode = per_demag_mode if per_demag_mode else demag_mode
 
+    # 除外点の解析: JSON 配列 → 行番号の集合
     try:
-        df, load_error = file_io.load_vsm_file(Path(tmp_path))
-        if df is None:
-            raise HTTPException(status_code=422, detail=load_error or "読み込み失敗")
-
-        metadata = file_io.parse_metadata(Path(tmp_path))
-
-        # ファイル別設定が指定されていればそちらを優先
-        effective_demag_mode = per_demag_mode if per_demag_mode else demag_mode
-
-        # 除外点の解析: JSON 配列 → 行番号の集合
-        try:
-            excluded_set = (
-                set(int(i) for i in json.loads(excluded_indices))
-                if excluded_indices.strip() else set()
-            )
-        except (ValueError, TypeError):
-            excluded_set = set()
-
-        log_buffer = io.StringIO()
-        with contextlib.redirect_stdout(log_buffer):
-            result = _run_analysis(
-                df=df,
-                thickness=thickness,
-                area=area,
-                demag_mode=effective_demag_mode,
-                demag_pos_range=(demag_pos_min, demag_pos_max),
-                demag_neg_range=(demag_neg_min, demag_neg_max),
-                offset_correction=offset_correction,
-                hs_tolerance=hs_tolerance,
-                hs_min_consecutive=hs_min_consecutive,
-                ms_manual=ms_manual,
-                ms_pos_range=(ms_pos_min, ms_pos_max),
-                ms_neg_range=(ms_neg_min, ms_neg_max),
-                excluded_set=excluded_set,
-                antisymmetrize=antisymmetrize,
-            )
-
-        result["filename"] = file.filename
-        result["metadata"] = metadata
-        result["logs"]     = [l for l in log_buffer.getvalue().splitlines() if l.strip()]
-        return result
+        excluded_set = (
+            set(int(i) for i in json.loads(excluded_indices))
+            if excluded_indices.strip() else set()
+        )
+    except (ValueError, TypeError):
+        excluded_set = set()
+
+    with _capture_stdout() as log_buffer:
+        result = _run_analysis(
+            H_oe=H_oe,
+            M_emu=M_emu,
+            thickness=thickness,
+            area=area,
+            demag_mode=effective_demag_mode,
+            demag_pos_range=(demag_pos_min, demag_pos_max),
+            demag_neg_range=(demag_neg_min, demag_neg_max),
+            offset_correction=offset_correction,
+            hs_tolerance=hs_tolerance,
+            hs_min_consecutive=hs_min_consecutive,
+            ms_manual=ms_manual,
+            ms_pos_range=(ms_pos_min, ms_pos_max),
+            ms_neg_range=(ms_neg_min, ms_neg_max),
+            excluded_set=excluded_set,
+            antisymmetrize=antisymmetrize,
+        )
 
-    finally:
-        os.unlink(tmp_path)
+    result["filename"] = file.filename
+    result["metadata"] = metadata
+    result["logs"]     = [l for l in log_buffer.getvalue().splitlines() if l.strip()]
+    return result
 
 
 def _run_analysis(
-    df, thickness, area,
+    H_oe, M_emu, thickness, area,
     demag_mode, demag_pos_range, demag_neg_range,
     offset_correction,
     hs_tolerance, hs_min_consecutive,
@@ -114,16 +150,23 @@ def _run_analysis(
     excluded_set = excluded_set or set()
 
     # 元データ全点（体積磁化へ換算）。元の行番号を保持したまま除外点をマスクする
-    H_all = df["H(Oe)"].values * 1e-4
-    M_all = df["M(emu)"].values / vol_cm3
+    H_all = H_oe * 1e-4
+    M_all = M_emu / vol_cm3
     n_total = len(H_all)
     orig_idx_all = np.arange(n_total)
 
-    keep = np.array([i not in excluded_set for i in range(n_total)], dtype=bool)
-    H_raw = H_all[keep]
-    M_raw = M_all[keep]
-    orig_idx = orig_idx_all[keep]
-    n_excluded = int((~keep).sum())
+    # 除外点マスクは Python ループを回さず、範囲内の行番号だけをまとめて落とす
+    keep = np.ones(n_total, dtype=bool)
+    excl = np.fromiter(excluded_set, dtype=np.intp, count=len(excluded_set))
+    keep[excl[(excl >= 0) & (excl < n_total)]] = False
+    n_excluded = n_total - int(np.count_nonzero(keep))
+    if n_excluded:
+        H_raw = H_all[keep]
+        M_raw = M_all[keep]
+        orig_idx = orig_idx_all[keep]
+    else:
+        # 除外点が無ければ（通常はこちら）全点配列をコピーせずそのまま使う
+        H_raw, M_raw, orig_idx = H_all, M_all, orig_idx_all
 
     print(f"--- 解析 (膜厚: {thickness} nm, 面積: {area} mm², 体積: {vol_cm3:.4e} cm³, "
           f"有効点: {len(H_raw)}, 除外点: {n_excluded}) ---")
@@ -132,9 +175,12 @@ def _run_analysis(
         raise HTTPException(status_code=422, detail="有効なデータ点が不足しています（除外点が多すぎます）")
 
     # ループ抽出（元の行番号 orig_idx も同じスライスで持ち回る）
+    # 最小磁場の位置はループ内でも同じなので、下の往路・復路分割でも使い回す
     min_idx = int(np.argmin(H_raw))
+    split = min_idx
     if min_idx >= len(H_raw) - 1:
         min_idx = len(H_raw) // 2
+        split = None
     max_idx2 = min_idx + int(np.argmax(H_raw[min_idx:]))
     H_loop   = H_raw[: max_idx2 + 1]
     M_loop   = M_raw[: max_idx2 + 1]
@@ -156,32 +202,45 @@ def _run_analysis(
     else:
         print("  反磁性補正: なし")
 
-    M_corrected = M_loop - H_loop * slope
+    M_corrected = vsm_logic.subtract_background(H_loop, M_loop, slope)
+
+    # ループの磁場範囲。オフセット補正と自動 Ms 範囲の両方で使うため一度だけ求める。
+    # 最小値は往路・復路の分割点でもあるので argmin の結果をそのまま使う
+    if split is None:
+        split = int(np.argmin(H_loop))
+    h_max, h_min = float(H_loop.max()), float(H_loop[split])
 
     # オフセット補正
     offset = 0.0
     if offset_correction:
-        H_np = H_loop
-        Ms_pos_o = float(np.mean(M_corrected[H_np > np.max(H_np) * 0.9])) \
-            if np.any(H_np > np.max(H_np) * 0.9) else 0.0
-        Ms_neg_o = float(np.mean(M_corrected[H_np < np.min(H_np) * 0.9])) \
-            if np.any(H_np < np.min(H_np) * 0.9) else 0.0
+        pos_mask = H_loop > h_max * 0.9
+        neg_mask = H_loop < h_min * 0.9
+        Ms_pos_o = float(np.mean(M_corrected, where=pos_mask)) if pos_mask.any() else 0.0
+        Ms_neg_o = float(np.mean(M_corrected, where=neg_mask)) if neg_mask.any() else 0.0
         offset = (Ms_pos_o + Ms_neg_o) / 2
-        M_corrected = M_corrected - offset
+        M_corrected -= offset
         print(f"  オフセット補正: {offset:.4f} kA/m")
 
     # 往路・復路分割
-    split = int(np.argmin(H_loop))
     H_down, M_down = H_loop[: split + 1], M_corrected[: split + 1]
     H_up,   M_up   = H_loop[split:],       M_corrected[split:]
     idx_down = idx_loop[: split + 1]
     idx_up   = idx_loop[split:]
 
+    # 各枝を H 昇順に並べるインデックス。H は以降の補正で変わらないため、
+    # 反対称化と Hs 計算で同じものを共用する
+    order_down = np.argsort(H_down, kind="stable")
+    order_up   = np.argsort(H_up,   kind="stable")
+
     # 反対称化（ONなら往路/復路を原点対称に補正し、磁場に偶な成分を除去）。
     # 枝を補正したうえで全ループ配列 M_corrected も再構築し、Ms 等の計算と整合させる。
     if antisymmetrize:
-        M_down, M_up = vsm_logic.antisymmetrize_loop(H_down, M_down, H_up, M_up)
-        M_corrected = np.concatenate([M_down, M_up[1:]])
+        M_down, M_up = vsm_logic.antisymmetrize_loop(
+            H_down, M_down, H_up, M_up, order_down=order_down, order_up=order_up,
+        )
+        # 新しい配列を連結せず、分割点を共有する全ループ配列へ書き戻す（分割点は往路側の値）
+        M_corrected[split:] = M_up
+        M_corrected[: split + 1] = M_down
         print("  反対称化: 適用（偶成分を除去。交換バイアスは0になります）")
 
     # Ms計算（可視化用に使用した磁場範囲も記録）
@@ -196,7 +255,6 @@ def _run_analysis(
         ms_neg_win = [float(ms_neg_range[0]), float(ms_neg_range[1])]
     else:
         Ms_result = vsm_logic.calculate_saturation_magnetization(H_loop, M_corrected)
-        h_max, h_min = float(np.max(H_loop)), float(np.min(H_loop))
         ms_pos_win = [h_max * 0.9, h_max]
         ms_neg_win = [h_min, h_min * 0.9]
     Ms     = Ms_result.get("avg") if Ms_result else None
@@ -214,6 +272,7 @@ def _run_analysis(
     Hs_result = vsm_logic.calculate_saturation_field(
         H_down, M_down, H_up, M_up, Ms=Ms or 0,
         tolerance_pct=hs_tolerance, min_consecutive=hs_min_consecutive,
+        order_down=order_down, order_up=order_up,
     ) if Ms else None
     Hs_Oe     = Hs_result.get("Oe")  if Hs_result else None
     Hs_pos_T  = Hs_result.get("pos") if Hs_result else None
@@ -229,7 +288,7 @@ def _run_analysis(
     # 除外点（表示用: 補正後グラフ上の座標に同じ補正を適用）
     excl_mask = ~keep
     H_excl = H_all[excl_mask]
-    M_excl = M_all[excl_mask] - H_excl * slope - offset
+    M_excl = vsm_logic.subtract_background(H_excl, M_all[excl_mask], slope, offset)
     idx_excl = orig_idx_all[excl_mask]
 
     return {
@@ -38,8 +38,11 @@ class ResolveResponse(BaseModel):
     missing:  list[str]
 
 
+# Plain def: the existence checks below are blocking filesystem calls (OneDrive
+# paths may hit the network), so FastAPI runs this in its threadpool instead of
+# stalling the event loop that also serves /health and /api/analyze.
 @router.post("/resolve", response_model=ResolveResponse)
-async def resolve_paths(req: ResolveRequest) -> ResolveResponse:
+def resolve_paths(req: ResolveRequest) -> ResolveResponse:
     """
     Resolve file paths for session loading using multiple fallback strategies:
     1. Relative path from session file directory
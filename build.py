@@ -43,6 +43,7 @@ def build_python_backend():
             "--collect-all", "pydantic",
             "--hidden-import", "anyio.backends.asyncio",
             "--exclude-module", "matplotlib",
+            "--exclude-module", "scipy",
             "--exclude-module", "tkinter",
             "--exclude-module", "_tkinter",
             "--add-data", f"analysis{';'}analysis",
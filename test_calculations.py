@@ -7,9 +7,11 @@ from analysis.calculations import (
     calculate_saturation_magnetization,
     calculate_coercivity,
     calculate_remanence,
+    calculate_saturation_field,
     find_demag_slope_auto,
     find_demag_slope_manual,
     antisymmetrize_loop,
+    subtract_background,
 )
 
 
@@ -149,6 +151,53 @@ def test_calculate_remanence():
     assert result == 50.0
 
 
+def _symmetric_branches(M_pos):
+    """正側 |H| 昇順の |M| 列から、原点対称な往路・復路を作る"""
+    H_pos = np.linspace(0.1, 1.0, len(M_pos))
+    M_pos = np.asarray(M_pos, dtype=float)
+    H_down = np.concatenate((H_pos[::-1], -H_pos))
+    M_down = np.concatenate((M_pos[::-1], -M_pos))
+    return H_down, M_down, -H_down, -M_down
+
+
+def test_calculate_saturation_field():
+    """飽和磁場(Hs)の計算が正しく動作するかテストする"""
+
+    # 1. 準備 (Arrange)
+    # Ms=1.0、閾値 0.98。|H|=0.1〜0.5 の 5 点が閾値未満で、|H|=0.6 から飽和します。
+    # |H|=0.8 の 1 点だけの落ち込みは、連続点数 (3) に満たないので無視されるはずです。
+    M_pos = [0.2, 0.4, 0.6, 0.8, 0.9, 0.99, 0.99, 0.5, 0.99, 0.99]
+    H_down, M_down, H_up, M_up = _symmetric_branches(M_pos)
+
+    # 2. 実行 (Act)
+    result = calculate_saturation_field(H_down, M_down, H_up, M_up, Ms=1.0)
+
+    # 3. 検証 (Assert)
+    assert pytest.approx(result["pos"]) == 0.6
+    assert pytest.approx(result["neg"]) == 0.6
+    assert pytest.approx(result["T"]) == 0.6
+    assert pytest.approx(result["Oe"]) == 6000.0
+
+
+def test_calculate_saturation_field_no_long_run():
+    """閾値未満の点が連続点数に満たない場合、最低磁場から飽和とみなすかテストする"""
+
+    # 1. 準備 (Arrange)
+    # 閾値未満の点は 1 点ずつしか続かないので、min_consecutive=3 のランは存在しません。
+    M_pos = [0.5, 0.99, 0.5, 0.99, 0.99, 0.5, 0.99, 0.99, 0.99, 0.99]
+    H_down, M_down, H_up, M_up = _symmetric_branches(M_pos)
+
+    # 2. 実行 (Act)
+    result = calculate_saturation_field(
+        H_down, M_down, H_up, M_up, Ms=1.0, min_consecutive=3
+    )
+
+    # 3. 検証 (Assert)
+    # 最も低い |H| (0.1) が Hs になるはずです。
+    assert pytest.approx(result["pos"]) == 0.1
+    assert pytest.approx(result["neg"]) == 0.1
+
+
 def test_find_demag_slope_auto():
     """反磁性補正の傾き自動検出が正しく動作するかテストする"""
 
@@ -185,3 +234,18 @@ def test_find_demag_slope_manual():
 
     # 3. 検証 (Assert)
     assert pytest.approx(slope, rel=1e-5) == -3.0
+
+
+def test_subtract_background():
+    """反磁性の傾きとオフセットの差し引きが正しく動作するかテストする"""
+
+    # 1. 準備 (Arrange)
+    H = np.array([-2.0, -1.0, 0.0, 1.0, 2.0])
+    M = np.array([-7.0, -4.0, 1.0, 6.0, 9.0])
+
+    # 2. 実行 (Act): 傾き 2、オフセット 1 を差し引く
+    result = subtract_background(H, M, slope=2.0, offset=1.0)
+
+    # 3. 検証 (Assert)
+    np.testing.assert_array_equal(result, M - 2.0 * H - 1.0)
+    np.testing.assert_array_equal(M, [-7.0, -4.0, 1.0, 6.0, 9.0])  # 入力は変更しない
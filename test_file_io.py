@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+# テスト対象の関数をインポート
+from analysis.file_io import load_vsm_arrays, load_vsm_bytes, load_vsm_file, parse_metadata
+
+
+def _make_vsm(encoding: str) -> bytes:
+    """ヘッダー部 (メタデータ付き) とデータ部を持つ最小限の VSM ファイル内容を作る"""
+    header = ["試料名=,サンプルA", "測定日=,2024/01/01", "コメント"]
+    header += [f"dummy{i}" for i in range(5)]
+    data = ["Time(s),H(Oe),M(emu)", "0,-100,-1.0", "1,0,0.0", "2,100,1.0"]
+    return "\r\n".join(header + data).encode(encoding)
+
+
+@pytest.mark.parametrize("encoding", ["shift-jis", "utf-8"])
+def test_load_vsm_bytes(encoding):
+    """メモリ上の内容から DataFrame とメタデータを一度に取り出せるかテストする"""
+
+    # 1. 準備 (Arrange)
+    raw = _make_vsm(encoding)
+
+    # 2. 実行 (Act)
+    df, metadata, error = load_vsm_bytes(raw, "sample.VSM")
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert list(df.columns) == ["Time(s)", "H(Oe)", "M(emu)"]  # 列はファイルのまま返す
+    assert list(df["H(Oe)"]) == [-100, 0, 100]
+    assert list(df["M(emu)"]) == [-1.0, 0.0, 1.0]
+    assert metadata == {"試料名": "サンプルA", "測定日": "2024/01/01"}
+
+
+def test_load_vsm_bytes_utf8_decodable_as_shift_jis():
+    """Shift-JIS としても復号できてしまう UTF-8 のメタデータが文字化けしないかテストする"""
+
+    # 1. 準備 (Arrange)
+    # 'サンプルA' の UTF-8 バイト列は Shift-JIS としてもエラーなく復号できる
+    header = ["試料名=,サンプルA"] + [f"dummy{i}" for i in range(5)]
+    data = ["Time(s),H(Oe),M(emu)", "0,-100,-1.0", "1,100,1.0"]
+    raw = "\r\n".join(header + data).encode("utf-8")
+
+    # 2. 実行 (Act)
+    df, metadata, error = load_vsm_bytes(raw, "sample.VSM")
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert metadata == {"試料名": "サンプルA"}
+
+
+def test_load_vsm_bytes_drops_rows_with_blank_auxiliary_cells():
+    """H, M 以外の列が空の行も、従来どおり欠損行として除かれるかテストする"""
+
+    # 1. 準備 (Arrange)
+    data = ["Time(s),H(Oe),M(emu)", "0,-100,-1.0", ",0,0.0", "2,100,1.0"]
+    raw = "\r\n".join(data).encode("shift-jis")
+
+    # 2. 実行 (Act)
+    df, _, error = load_vsm_bytes(raw, "sparse.VSM")
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert list(df["H(Oe)"]) == [-100, 100]
+    assert list(df.index) == [0, 2]  # 行番号は元データのまま
+
+
+def test_load_vsm_bytes_missing_columns():
+    """必要な列が無い場合にエラーメッセージが返るかテストする"""
+
+    # 1. 準備 (Arrange)
+    raw = b"a,b\n1,2\n"
+
+    # 2. 実行 (Act)
+    df, _, error = load_vsm_bytes(raw, "bad.VSM")
+
+    # 3. 検証 (Assert)
+    assert df is None
+    assert "bad.VSM" in error
+
+
+def test_load_vsm_file_matches_bytes(tmp_path):
+    """パス経由の読み込みがバイト列からの読み込みと同じ結果になるかテストする"""
+
+    # 1. 準備 (Arrange)
+    path = tmp_path / "sample.VSM"
+    path.write_bytes(_make_vsm("shift-jis"))
+
+    # 2. 実行 (Act)
+    df, error = load_vsm_file(path)
+    metadata = parse_metadata(path)
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert len(df) == 3
+    assert metadata["試料名"] == "サンプルA"
+
+
+def test_load_vsm_bytes_cached():
+    """同じ内容の再読み込みがキャッシュから返されるかテストする"""
+
+    # 1. 準備 (Arrange)
+    raw = _make_vsm("utf-8")
+
+    # 2. 実行 (Act)
+    df1, meta1, _ = load_vsm_bytes(raw, "sample.VSM")
+    df2, meta2, _ = load_vsm_bytes(bytes(raw), "sample.VSM")
+
+    # 3. 検証 (Assert)
+    assert df1 is df2  # パースし直さず同じ DataFrame を返す
+    assert meta1 == meta2 and meta1 is not meta2  # メタデータは呼び出しごとの複製
+
+
+def test_load_vsm_bytes_utf8_bom():
+    """UTF-8 (BOM 付き) のファイルも文字化けせずに読み込めるかテストする"""
+
+    # 1. 準備 (Arrange)
+    raw = b"\xef\xbb\xbf" + _make_vsm("utf-8")
+
+    # 2. 実行 (Act)
+    df, metadata, error = load_vsm_bytes(raw, "bom.VSM")
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert len(df) == 3
+    assert metadata["試料名"] == "サンプルA"
+
+
+def test_load_vsm_arrays():
+    """H, M 列が書き込み不可の float64 配列として取り出せるかテストする"""
+
+    # 1. 準備 (Arrange)
+    raw = _make_vsm("shift-jis")
+
+    # 2. 実行 (Act)
+    H, M, metadata, error = load_vsm_arrays(raw, "sample.VSM")
+
+    # 3. 検証 (Assert)
+    assert error is None
+    assert H.dtype == np.float64 and list(H) == [-100.0, 0.0, 100.0]
+    assert list(M) == [-1.0, 0.0, 1.0]
+    assert not H.flags.writeable and not M.flags.writeable  # キャッシュと共有するため
+    assert metadata["試料名"] == "サンプルA"
+
+
+def test_load_vsm_file_returns_independent_copy(tmp_path):
+    """返された DataFrame を変更しても、次の読み込み結果に影響しないかテストする"""
+
+    # 1. 準備 (Arrange)
+    path = tmp_path / "sample.VSM"
+    path.write_bytes(_make_vsm("shift-jis"))
+
+    # 2. 実行 (Act)
+    df1, _ = load_vsm_file(path)
+    df1["H(Oe)"] = 0.0
+    df2, _ = load_vsm_file(path)
+
+    # 3. 検証 (Assert)
+    assert list(df2["H(Oe)"]) == [-100, 0, 100]
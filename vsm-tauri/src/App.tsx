@@ -1,21 +1,24 @@
-import { useState, useCallback, useEffect, useRef } from "react";
+import { lazy, Suspense, useState, useCallback, useEffect, useRef } from "react";
 import { invoke } from "@tauri-apps/api/core";
 import { fetch } from "@tauri-apps/plugin-http";
 import { save } from "@tauri-apps/plugin-dialog";
 import { writeTextFile } from "@tauri-apps/plugin-fs";
 import "./App.css";
 import Sidebar from "./components/Sidebar";
-import Graph from "./components/Graph";
 import ResultsTable from "./components/ResultsTable";
 import StatusBar from "./components/StatusBar";
 import MenuBar from "./components/MenuBar";
 import MissingFilesDialog from "./components/MissingFilesDialog";
 import {
-  analyzeFile, AnalysisResult, AnalysisParams, FileCalcSettings, FileWithPath,
+  analyzeFile, analysisKey, AnalysisResult, AnalysisParams, FileCalcSettings, FileWithPath,
   openSessionFilePicker, getSessionEnv, resolveSessionPaths, pathToFileWithPath,
 } from "./api/client";
 import { computeRelativePath, computeOnedrivePath } from "./utils/sessionPaths";
 
+// Plotly はバンドルの大半を占めるため、グラフは別チャンクで遅延読み込みし、
+// サイドバー等を先に表示してバックエンド起動と並行して読み込む
+const Graph = lazy(() => import("./components/Graph"));
+
 export type FileEntry = {
   file:          File;
   filePath:      string;        // Tauri ダイアログで開いた絶対パス（空文字 = 不明）
@@ -120,6 +123,22 @@ const DEFAULT_GRAPH: GraphSettings = {
   marginB: 70, marginL: 90,
 };
 
+// patch の全キーが現在値と同じなら true（適用しても状態が変わらない）
+function isNoopPatch<T extends object>(cur: T, patch: Partial<T>): boolean {
+  return (Object.keys(patch) as (keyof T)[]).every((k) => Object.is(cur[k], patch[k]));
+}
+
+// ファイル別計算設定が同じか（キーの集合と各値が一致。除外点リストは参照で比べる）
+function sameCalcSettings(a: FileCalcSettings, b: FileCalcSettings): boolean {
+  return Object.keys(a).length === Object.keys(b).length && isNoopPatch(a, b);
+}
+
+// Base64 の復号はブラウザのネイティブ実装に任せる（data URL を読む）。1 文字ずつの JS ループで
+// メインスレッドを止めず、複数ファイルも並行に復号される。plugin-http の fetch ではなく標準の fetch を使う
+function decodeBase64(b64: string): Promise<ArrayBuffer> {
+  return window.fetch(`data:application/octet-stream;base64,${b64}`).then((r) => r.arrayBuffer());
+}
+
 function App() {
   const [entries,       setEntries]       = useState<FileEntry[]>([]);
   const [params,        setParams]        = useState<AnalysisParams>(DEFAULT_PARAMS);
@@ -147,12 +166,15 @@ function App() {
 
     let fast = true;
     let attempts = 0;
+    // 定期ヘルスチェックは状態が変わったときだけログに書く（5秒ごとに追記・再描画しない）
+    let lastOk: boolean | null = null;
     const check = async () => {
       attempts++;
       try {
         const res = await fetch("http://localhost:8000/health");
         if (res.ok) {
-          addLog(`[2] ✓ ヘルスチェック成功 (試行${attempts}回目)`);
+          if (lastOk !== true) addLog(`[2] ✓ ヘルスチェック成功 (試行${attempts}回目)`);
+          lastOk = true;
           setBackendStatus("ready");
           if (fast) { fast = false; clearInterval(poll); poll = setInterval(check, 5000); }
         } else {
@@ -160,7 +182,8 @@ function App() {
         }
       } catch (e) {
         if (!fast) {
-          addLog(`[2] ✗ ヘルスチェック失敗: ${e}`);
+          if (lastOk !== false) addLog(`[2] ✗ ヘルスチェック失敗: ${e}`);
+          lastOk = false;
           setBackendStatus("error");
         }
       }
@@ -177,7 +200,75 @@ function App() {
     return () => clearInterval(poll);
   }, []);
 
-  const runAnalysis = useCallback(async (items: FileWithPath[], replace: boolean) => {
+  // ── 再解析の合流 ─────────────────────────────────────────────
+  // 数値入力は1文字ごとに変更が届くため、その都度 API を叩かず「要再解析」印だけを付け、
+  // 入力が 250ms 途切れたところで 1 回だけ、その時点の最新設定でまとめて再解析する
+  const paramsRef  = useRef(params);
+  const entriesRef = useRef(entries);
+  paramsRef.current  = params;
+  entriesRef.current = entries;
+  const pendingFiles   = useRef<Set<File> | "all" | null>(null);
+  const reanalyzeTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  // 複数ファイルを並行に解析し、結果は全件そろってから File 単位で 1 回の setEntries で反映する
+  // （1 件ごとに反映すると N ファイルで N 回、毎回全行を再描画することになる）
+  // File ごとの最新の解析依頼番号。後から発行した依頼の結果が先に届いた場合、
+  // 古い設定で解析した応答は捨てる（新しい結果を上書きせず、無駄な再描画もしない）
+  const requestSeq    = useRef(0);
+  const latestRequest = useRef(new WeakMap<File, number>());
+  // File ごとに最後に解析を依頼した条件（analysisKey）。表示にしか効かない設定の変更や、
+  // ファイル別の膜厚を指定しているファイルでのグローバル膜厚の変更などでは条件が変わらないので再送しない
+  const requestedKey  = useRef(new WeakMap<File, string>());
+
+  const analyzeAndMerge = useCallback((
+    targets: Pick<FileEntry, "file" | "calcSettings">[], p: AnalysisParams,
+  ) => {
+    const todo: { file: File; calcSettings?: FileCalcSettings; key: string }[] = [];
+    const unchanged = new Set<File>();
+    targets.forEach((e) => {
+      const key = analysisKey(p, e.calcSettings);
+      if (requestedKey.current.get(e.file) !== key) todo.push({ ...e, key });
+      // 同じ条件の依頼が応答待ちなら、その結果が届くまで解析中のままにしておく
+      else if (!latestRequest.current.has(e.file)) unchanged.add(e.file);
+    });
+    if (unchanged.size > 0) {
+      setEntries((c) => c.map((e) => unchanged.has(e.file) && e.loading ? { ...e, loading: false } : e));
+    }
+    if (todo.length === 0) return;
+
+    const seq = ++requestSeq.current;
+    todo.forEach((e) => {
+      latestRequest.current.set(e.file, seq);
+      requestedKey.current.set(e.file, e.key);
+    });
+    Promise.all(
+      todo.map((e) =>
+        analyzeFile(e.file, p, e.calcSettings)
+          .then((r) => ({ result: r, error: null }))
+          .catch((err: Error) => ({ result: null, error: err.message }))
+      )
+    ).then((results) => {
+      const byFile = new Map(
+        todo
+          .map((e, i) => [e.file, results[i]] as const)
+          .filter(([file]) => latestRequest.current.get(file) === seq),
+      );
+      if (byFile.size === 0) return;
+      byFile.forEach((res, file) => {
+        latestRequest.current.delete(file);
+        // 失敗した条件は覚えておかない（バックエンド再起動後などに同じ条件で再試行できるように）
+        if (res.error !== null) requestedKey.current.delete(file);
+      });
+      setEntries((c) => c.map((e) => {
+        const res = byFile.get(e.file);
+        return res ? { ...e, result: res.result, error: res.error, loading: false } : e;
+      }));
+    });
+  }, []);
+
+  // ファイルを開く/追加する。解析は再解析と同じ経路で行い、開いた直後に設定を変えた場合も
+  // 後から届いた古い設定の結果で上書きしない
+  const runAnalysis = useCallback((items: FileWithPath[], replace: boolean) => {
     setEntries((prev) => {
       const base = replace ? [] : prev;
       const added: FileEntry[] = items.map((item, i) => ({
@@ -187,85 +278,71 @@ function App() {
       }));
       return [...base, ...added];
     });
-
-    const results = await Promise.all(
-      items.map(({ file }) =>
-        analyzeFile(file, params)
-          .then((r) => ({ result: r, error: null }))
-          .catch((e: Error) => ({ result: null, error: e.message }))
-      )
+    analyzeAndMerge(items.map(({ file }) => ({ file })), paramsRef.current);
+  }, [analyzeAndMerge]);
+
+  const flushReanalysis = useCallback(() => {
+    reanalyzeTimer.current = null;
+    const pending = pendingFiles.current;
+    pendingFiles.current = null;
+    if (!pending) return;
+    analyzeAndMerge(
+      entriesRef.current.filter((e) => pending === "all" || pending.has(e.file)),
+      paramsRef.current,
     );
+  }, [analyzeAndMerge]);
 
-    setEntries((prev) => {
-      const next = [...prev];
-      const offset = replace ? 0 : next.length - items.length;
-      items.forEach((_item, i) => {
-        next[offset + i] = { ...next[offset + i], result: results[i].result, error: results[i].error, loading: false };
-      });
-      return next;
-    });
-  }, [params]);
+  const scheduleReanalysis = useCallback((files: File[] | "all") => {
+    if (files === "all" || pendingFiles.current === "all") {
+      pendingFiles.current = "all";
+    } else {
+      const set = pendingFiles.current ?? new Set<File>();
+      files.forEach((f) => set.add(f));
+      pendingFiles.current = set;
+    }
+    // 連続入力中は前回の予約を取り消して張り直す（タイプ中の途中値では解析しない）
+    if (reanalyzeTimer.current !== null) clearTimeout(reanalyzeTimer.current);
+    reanalyzeTimer.current = setTimeout(flushReanalysis, 250);
+  }, [flushReanalysis]);
 
   const updateParams = useCallback((next: Partial<AnalysisParams>) => {
-    setParams((prev) => {
-      const merged = { ...prev, ...next };
-      setEntries((cur) => {
-        if (cur.length === 0) return cur;
-        const loading: FileEntry[] = cur.map((e) => ({ ...e, loading: true }));
-        Promise.all(
-          cur.map((e) =>
-            analyzeFile(e.file, merged, e.calcSettings)
-              .then((r) => ({ result: r, error: null }))
-              .catch((e: Error) => ({ result: null, error: e.message }))
-          )
-        ).then((results) => {
-          setEntries((c) => c.map((e, i) => ({ ...e, result: results[i].result, error: results[i].error, loading: false })));
-        });
-        return loading;
-      });
-      return merged;
-    });
-  }, []);
+    // 同じ値の書き戻し（フォーカス移動時の再設定など）では再解析しない
+    if (isNoopPatch(paramsRef.current, next)) return;
+    paramsRef.current = { ...paramsRef.current, ...next };
+    setParams((prev) => ({ ...prev, ...next }));
+    // 入力中は 1 文字ごとに呼ばれる。全件すでに解析待ちなら entries を差し替えず、再描画を起こさない
+    setEntries((cur) => cur.every((e) => e.loading) ? cur : cur.map((e) => ({ ...e, loading: true })));
+    scheduleReanalysis("all");
+  }, [scheduleReanalysis]);
 
   const updateEntryCalcSettings = useCallback((index: number, patch: Partial<FileCalcSettings>) => {
-    setEntries((prev) => {
-      const next = prev.map((e, i) => {
-        if (i !== index) return e;
-        return { ...e, calcSettings: { ...e.calcSettings, ...patch }, loading: true };
-      });
-      const entry = next[index];
-      analyzeFile(entry.file, params, entry.calcSettings)
-        .then((r) => setEntries((c) => c.map((e, i) => i === index ? { ...e, result: r, error: null, loading: false } : e)))
-        .catch((err: Error) => setEntries((c) => c.map((e, i) => i === index ? { ...e, result: null, error: err.message, loading: false } : e)));
-      return next;
-    });
-  }, [params]);
+    const entry = entriesRef.current[index];
+    if (!entry || isNoopPatch<Partial<FileCalcSettings>>(entry.calcSettings ?? {}, patch)) return;
+    setEntries((prev) => prev.map((e, i) =>
+      i === index ? { ...e, calcSettings: { ...e.calcSettings, ...patch }, loading: true } : e
+    ));
+    scheduleReanalysis([entry.file]);
+  }, [scheduleReanalysis]);
 
   const updateEntryDisplay = useCallback((index: number, patch: Partial<Pick<FileEntry, "legendName" | "color" | "markerSymbol" | "showAnnot">>) => {
     setEntries((prev) => prev.map((e, i) => i === index ? { ...e, ...patch } : e));
   }, []);
 
   // グラフ上のクリックで除外点をトグル（元データ行番号ベース）→ 再解析
+  // 連続クリックも数値入力と同じ合流経路に乗せ、最後のクリック後に 1 回だけ解析する
   const toggleExclude = useCallback((index: number, origIdx: number) => {
-    setEntries((prev) => {
-      const target = prev[index];
-      if (!target) return prev;
-      const cur = target.calcSettings?.excludedIndices ?? [];
+    const target = entriesRef.current[index];
+    if (!target) return;
+    setEntries((prev) => prev.map((e, i) => {
+      if (i !== index) return e;
+      const cur = e.calcSettings?.excludedIndices ?? [];
       const nextList = cur.includes(origIdx)
-        ? cur.filter((i) => i !== origIdx)
+        ? cur.filter((j) => j !== origIdx)
         : [...cur, origIdx];
-      const next = prev.map((e, i) =>
-        i === index
-          ? { ...e, calcSettings: { ...e.calcSettings, excludedIndices: nextList }, loading: true }
-          : e
-      );
-      const entry = next[index];
-      analyzeFile(entry.file, params, entry.calcSettings)
-        .then((r) => setEntries((c) => c.map((e, i) => i === index ? { ...e, result: r, error: null, loading: false } : e)))
-        .catch((err: Error) => setEntries((c) => c.map((e, i) => i === index ? { ...e, result: null, error: err.message, loading: false } : e)));
-      return next;
-    });
-  }, [params]);
+      return { ...e, calcSettings: { ...e.calcSettings, excludedIndices: nextList }, loading: true };
+    }));
+    scheduleReanalysis([target.file]);
+  }, [scheduleReanalysis]);
 
   const removeEntry  = useCallback((i: number) => setEntries((p) => p.filter((_, j) => j !== i)), []);
 
@@ -279,22 +356,21 @@ function App() {
   }, []);
 
   // 1番目ファイルの calcSettings を全ファイルに適用
+  // 再解析は合流経路に乗せ、直前まで入力していた 1 番目ファイルの再解析予約と 1 回にまとめる
+  // すでに同じ設定のファイルは差し替えない（行の再描画も再解析もしない）
   const applyFirstToAll = useCallback(() => {
-    setEntries((prev) => {
-      if (prev.length < 2) return prev;
-      const firstCalc = { ...prev[0].calcSettings };
-      const updated = prev.map((e, i) =>
-        i === 0 ? e : { ...e, calcSettings: firstCalc, loading: true }
-      );
-      updated.slice(1).forEach((e, i) => {
-        const idx = i + 1;
-        analyzeFile(e.file, params, e.calcSettings)
-          .then((r) => setEntries((c) => c.map((ce, j) => j === idx ? { ...ce, result: r, error: null, loading: false } : ce)))
-          .catch((err: Error) => setEntries((c) => c.map((ce, j) => j === idx ? { ...ce, result: null, error: err.message, loading: false } : ce)));
-      });
-      return updated;
-    });
-  }, [params]);
+    const cur = entriesRef.current;
+    if (cur.length < 2) return;
+    const firstCalc = { ...cur[0].calcSettings };
+    const changed = new Set(
+      cur.slice(1).filter((e) => !sameCalcSettings(e.calcSettings ?? {}, firstCalc)).map((e) => e.file)
+    );
+    if (changed.size === 0) return;
+    setEntries((prev) => prev.map((e) =>
+      changed.has(e.file) ? { ...e, calcSettings: firstCalc, loading: true } : e
+    ));
+    scheduleReanalysis([...changed]);
+  }, [scheduleReanalysis]);
 
   // ── セッション保存 (v2: パス参照方式) ─────────────────────────
   const saveSession = useCallback(async (): Promise<boolean> => {
@@ -373,33 +449,22 @@ function App() {
     setUnitMode((session.unitMode as UnitMode) ?? "SI");
     setFieldUnit((session.fieldUnit as "mT" | "Oe") ?? "mT");
     setEntries(restoredEntries);
-    const results = await Promise.all(
-      restoredEntries.map((e) =>
-        analyzeFile(e.file, rp, e.calcSettings)
-          .then((r) => ({ result: r, error: null }))
-          .catch((err: Error) => ({ result: null, error: err.message }))
-      )
-    );
-    setEntries((prev) => prev.map((e, i) => ({
-      ...e, result: results[i].result, error: results[i].error, loading: false,
-    })));
-  }, []);
+    analyzeAndMerge(restoredEntries, rp);
+  }, [analyzeAndMerge]);
 
   // ── v1 セッション適用 (後方互換: Base64 埋め込み) ──────────────
   const applySessionV1 = useCallback(async (session: SessionData) => {
-    const restoredEntries: FileEntry[] = (session.entries as SessionEntryV1[]).map((e, i) => {
-      const binary = atob(e.fileData ?? "");
-      const bytes  = Uint8Array.from(binary, (c) => c.charCodeAt(0));
-      return {
-        file: new File([bytes], e.filename), filePath: "",
+    const restoredEntries: FileEntry[] = await Promise.all(
+      (session.entries as SessionEntryV1[]).map(async (e, i) => ({
+        file: new File([await decodeBase64(e.fileData ?? "")], e.filename), filePath: "",
         result: null, error: null, loading: true,
         color:        e.color ?? FILE_COLORS[i % FILE_COLORS.length],
         legendName:   e.legendName,
         markerSymbol: e.markerSymbol,
         showAnnot:    e.showAnnot,
         calcSettings: e.calcSettings,
-      };
-    });
+      }))
+    );
     const rp: AnalysisParams = session.params;
     setParams(rp);
     // 古いセッションファイルに無い新設項目は DEFAULT_GRAPH の値で補完する
@@ -407,17 +472,8 @@ function App() {
     setUnitMode((session.unitMode as UnitMode) ?? "SI");
     setFieldUnit((session.fieldUnit as "mT" | "Oe") ?? "mT");
     setEntries(restoredEntries);
-    const results = await Promise.all(
-      restoredEntries.map((e) =>
-        analyzeFile(e.file, rp, e.calcSettings)
-          .then((r) => ({ result: r, error: null }))
-          .catch((err: Error) => ({ result: null, error: err.message }))
-      )
-    );
-    setEntries((prev) => prev.map((e, i) => ({
-      ...e, result: results[i].result, error: results[i].error, loading: false,
-    })));
-  }, []);
+    analyzeAndMerge(restoredEntries, rp);
+  }, [analyzeAndMerge]);
 
   // ── セッション読み込みエントリーポイント ───────────────────────
   const loadSession = useCallback(async () => {
@@ -578,7 +634,9 @@ function App() {
 
         {/* グラフ・結果エリア */}
         <div className="flex flex-col flex-1 overflow-hidden min-w-0">
-          <Graph entries={entries} unitMode={unitMode} graphSettings={graphSettings} onToggleExclude={toggleExclude} />
+          <Suspense fallback={<div className="flex-1 min-h-0 bg-zinc-950" />}>
+            <Graph entries={entries} unitMode={unitMode} graphSettings={graphSettings} onToggleExclude={toggleExclude} />
+          </Suspense>
           {/* 解析結果パネル縦リサイズハンドル */}
           <div
             className="group h-2 shrink-0 cursor-row-resize flex items-center justify-center bg-zinc-900 hover:bg-indigo-950/80 transition-colors"
@@ -110,33 +110,49 @@ export async function openSessionFilePicker(): Promise<FileWithPath | null> {
 
 // ── 解析 API ───────────────────────────────────────────────────
 
+/** 解析 API に送るフォーム項目（ファイル本体以外）。ファイル別設定が優先される */
+function analysisFields(params: AnalysisParams, s: FileCalcSettings): [string, string][] {
+  return [
+    ["thickness",          String(s.thickness    ?? params.thickness)],
+    ["area",               String(s.area         ?? params.area)],
+    ["demag_mode",         params.demagMode],
+    ["offset_correction",  String(params.offsetCorrection)],
+    ["hs_tolerance",       String(params.hsTolerance)],
+    ["hs_min_consecutive", String(params.hsMinConsecutive)],
+    ["per_demag_mode",     s.perDemagMode  ?? ""],
+    ["demag_pos_min",      String(s.demagPosMin  ?? 0.5)],
+    ["demag_pos_max",      String(s.demagPosMax  ?? 2.0)],
+    ["demag_neg_min",      String(s.demagNegMin  ?? -2.0)],
+    ["demag_neg_max",      String(s.demagNegMax  ?? -0.5)],
+    ["ms_manual",          String(s.msManual     ?? false)],
+    ["ms_pos_min",         String(s.msPosMin     ?? 0.5)],
+    ["ms_pos_max",         String(s.msPosMax     ?? 2.0)],
+    ["ms_neg_min",         String(s.msNegMin     ?? -2.0)],
+    ["ms_neg_max",         String(s.msNegMax     ?? -0.5)],
+    ["ms_link_ranges",     String(s.msLinkRanges ?? true)],
+    ["excluded_indices",   JSON.stringify(s.excludedIndices ?? [])],
+    ["antisymmetrize",     String(s.antisymmetrize ?? false)],
+  ];
+}
+
+/** 解析結果に影響しないため analysisKey に含めない項目（バックエンドは受け取るだけで使わない） */
+const KEY_IGNORED_FIELDS = new Set(["ms_link_ranges"]);
+
+/** 解析条件のキー。キーが同じなら同じファイルの解析結果も同じ（再解析の要否判定に使う） */
+export function analysisKey(params: AnalysisParams, fileSettings?: FileCalcSettings): string {
+  return JSON.stringify(
+    analysisFields(params, fileSettings ?? {}).filter(([key]) => !KEY_IGNORED_FIELDS.has(key)),
+  );
+}
+
 export async function analyzeFile(
   file: File,
   params: AnalysisParams,
   fileSettings?: FileCalcSettings,
 ): Promise<AnalysisResult> {
-  const s = fileSettings ?? {};
   const form = new FormData();
-  form.append("file",               file);
-  form.append("thickness",          String(s.thickness    ?? params.thickness));
-  form.append("area",               String(s.area         ?? params.area));
-  form.append("demag_mode",         params.demagMode);
-  form.append("offset_correction",  String(params.offsetCorrection));
-  form.append("hs_tolerance",       String(params.hsTolerance));
-  form.append("hs_min_consecutive", String(params.hsMinConsecutive));
-  form.append("per_demag_mode",     s.perDemagMode  ?? "");
-  form.append("demag_pos_min",      String(s.demagPosMin  ?? 0.5));
-  form.append("demag_pos_max",      String(s.demagPosMax  ?? 2.0));
-  form.append("demag_neg_min",      String(s.demagNegMin  ?? -2.0));
-  form.append("demag_neg_max",      String(s.demagNegMax  ?? -0.5));
-  form.append("ms_manual",          String(s.msManual     ?? false));
-  form.append("ms_pos_min",         String(s.msPosMin     ?? 0.5));
-  form.append("ms_pos_max",         String(s.msPosMax     ?? 2.0));
-  form.append("ms_neg_min",         String(s.msNegMin     ?? -2.0));
-  form.append("ms_neg_max",         String(s.msNegMax     ?? -0.5));
-  form.append("ms_link_ranges",     String(s.msLinkRanges ?? true));
-  form.append("excluded_indices",   JSON.stringify(s.excludedIndices ?? []));
-  form.append("antisymmetrize",      String(s.antisymmetrize ?? false));
+  form.append("file", file);
+  for (const [key, value] of analysisFields(params, fileSettings ?? {})) form.append(key, value);
 
   const res = await fetch(`${BASE}/api/analyze`, { method: "POST", body: form });
   if (!res.ok) {
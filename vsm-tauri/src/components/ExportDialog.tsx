@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { createPortal } from "react-dom";
-import { downloadGraphImage, copyGraphToClipboard, getPreviewUrl } from "../utils/graphExport";
-import type { ExportOptions } from "../utils/graphExport";
+import { downloadGraphImage, copyGraphToClipboard, getPreviewUrl, onGraphRedraw, snapshotGraph } from "../utils/graphExport";
+import type { ExportOptions, GraphSnapshot } from "../utils/graphExport";
 
 type Format = ExportOptions["format"];
 
@@ -36,9 +36,23 @@ export default function ExportDialog({ onClose }: { onClose: () => void }) {
   const [saving,     setSaving]     = useState(false);
   const [copying,    setCopying]    = useState(false);
   const [msg,        setMsg]        = useState<{ text: string; ok: boolean } | null>(null);
+  const [graphRev,   setGraphRev]   = useState(0);
 
   const prevUrlRef = useRef<string | null>(null);
   const arRatioRef = useRef(1.0);
+  // グラフの合成 SVG はサイズ変更のプレビューで使い回す。ダイアログ表示中も再解析やグラフ設定の
+  // 変更でグラフは描き直されるので、描き直しのたびに作り直し、保存・コピーはその時点のグラフから作る
+  const snapRef = useRef<GraphSnapshot | null>(null);
+  const getSnapshot = () => {
+    if (!snapRef.current) snapRef.current = snapshotGraph();
+    return snapRef.current;
+  };
+  const freshSnapshot = () => (snapRef.current = snapshotGraph());
+
+  useEffect(() => onGraphRedraw(() => {
+    snapRef.current = null;
+    setGraphRev((n) => n + 1);
+  }), []);
 
   const isCustom = PRESETS[presetIdx].w === 0;
   const outW = isCustom ? customW : PRESETS[presetIdx].w;
@@ -73,7 +87,7 @@ export default function ExportDialog({ onClose }: { onClose: () => void }) {
     let cancelled = false;
     const timer = setTimeout(async () => {
       try {
-        const url = await getPreviewUrl(outW, outH);
+        const url = await getPreviewUrl(outW, outH, getSnapshot());
         if (cancelled) { URL.revokeObjectURL(url); return; }
         if (prevUrlRef.current) URL.revokeObjectURL(prevUrlRef.current);
         prevUrlRef.current = url;
@@ -81,7 +95,7 @@ export default function ExportDialog({ onClose }: { onClose: () => void }) {
       } catch { /* グラフ未描画時はプレビューなし */ }
     }, 200);
     return () => { cancelled = true; clearTimeout(timer); };
-  }, [outW, outH]);
+  }, [outW, outH, graphRev]);
 
   useEffect(() => () => { if (prevUrlRef.current) URL.revokeObjectURL(prevUrlRef.current); }, []);
 
@@ -93,7 +107,9 @@ export default function ExportDialog({ onClose }: { onClose: () => void }) {
   const handleSave = async () => {
     setSaving(true);
     try {
-      const saved = await downloadGraphImage({ format, scale: 1, useCustomSize: true, width: outW, height: outH });
+      const saved = await downloadGraphImage(
+        { format, scale: 1, useCustomSize: true, width: outW, height: outH }, freshSnapshot(),
+      );
       if (saved) flash("保存しました", true);
     } catch (e) {
       flash((e as Error).message ?? "保存に失敗しました", false);
@@ -103,7 +119,7 @@ export default function ExportDialog({ onClose }: { onClose: () => void }) {
   const handleCopy = async () => {
     setCopying(true);
     try {
-      await copyGraphToClipboard(1, outW, outH);
+      await copyGraphToClipboard(1, outW, outH, freshSnapshot());
       flash("クリップボードにコピーしました", true);
     } catch (e) {
       flash((e as Error).message ?? "コピーに失敗しました", false);
@@ -1,7 +1,12 @@
+import { memo, useCallback, useDeferredValue, useEffect, useMemo, useRef } from "react";
 import Plot from "react-plotly.js";
-import type { Data, Layout } from "plotly.js";
+import Plotly from "plotly.js/dist/plotly";
+import type { Config, Data, Layout, PlotMouseEvent } from "plotly.js";
 import type { FileEntry, UnitMode, GraphSettings, PaperColorScheme } from "../App";
+import type { AnalysisResult } from "../api/client";
 import { texToDisplay } from "../utils/texToDisplay";
+import { fileKey } from "../utils/fileKey";
+import { notifyGraphRedraw } from "../utils/graphExport";
 
 interface Props {
   entries:          FileEntry[];
@@ -10,14 +15,57 @@ interface Props {
   onToggleExclude?: (entryIndex: number, origIdx: number) => void;
 }
 
-function convertAxes(
-  H_T: number[], M_kAm: number[], Ms: number | null | undefined, mode: UnitMode
-): { H: number[]; M: number[] } {
-  switch (mode) {
-    case "CGS":        return { H: H_T.map((h) => h * 10000), M: M_kAm };
-    case "Normalized": return { H: H_T, M: Ms ? M_kAm.map((m) => m / Ms) : M_kAm };
-    default:           return { H: H_T, M: M_kAm };
-  }
+// 表示単位へ換算しながら各区間を連結した型付き配列を作る。ホバー表示や SVG 出力に値がそのまま
+// 出るため、float32 の丸め（1.2345678e-3 → 0.0012345677 など）が出ないよう float64 で持つ
+function toDisplayArrays(
+  Hparts: number[][], Mparts: number[][], Ms: number | null | undefined, mode: UnitMode
+): { H: Float64Array; M: Float64Array } {
+  const n = Hparts.reduce((acc, p) => acc + p.length, 0);
+  const H = new Float64Array(n);
+  const M = new Float64Array(n);
+  const hScale = mode === "CGS" ? 10000 : 1;
+  const mScale = mode === "Normalized" && Ms ? 1 / Ms : 1;
+  let off = 0;
+  Hparts.forEach((hp, k) => {
+    const mp = Mparts[k];
+    for (let i = 0; i < hp.length; i++) {
+      H[off + i] = hp[i] * hScale;
+      M[off + i] = mp[i] * mScale;
+    }
+    off += hp.length;
+  });
+  return { H, M };
+}
+
+// 単位換算・連結済みのプロット配列。customdata は [ファイル番号, 元データ行番号]
+type PlotArrays = { H: Float64Array; M: Float64Array; customdata?: number[][] };
+
+// 解析結果ごとの換算済み配列キャッシュ。結果は再解析のたびに新しいオブジェクトへ
+// 差し替わるため、線幅・色などの表示設定だけが変わったときは同じ配列を使い回せる。
+// 同じ配列参照を渡すと Plotly.react もそのトレースの再計算を省略する
+const plotArrayCache = new WeakMap<AnalysisResult, Map<string, { loop: PlotArrays; excl?: PlotArrays }>>();
+
+function getPlotArrays(r: AnalysisResult, mode: UnitMode, idx: number): { loop: PlotArrays; excl?: PlotArrays } {
+  let byKey = plotArrayCache.get(r);
+  if (!byKey) { byKey = new Map(); plotArrayCache.set(r, byKey); }
+  const key = `${mode}:${idx}`;
+  const hit = byKey.get(key);
+  if (hit) return hit;
+
+  const { H_down, M_down, H_up, M_up, idx_down, idx_up } = r.plot;
+  const { H, M } = toDisplayArrays([H_down, H_up], [M_down, M_up], r.Ms, mode);
+  const origIdx = [...(idx_down ?? []), ...(idx_up ?? [])];
+  const loop: PlotArrays = {
+    H, M,
+    customdata: origIdx.length === H.length ? origIdx.map((oi) => [idx, oi]) : undefined,
+  };
+  const exc = r.excluded;
+  const excl: PlotArrays | undefined = exc && exc.idx.length > 0
+    ? { ...toDisplayArrays([exc.H], [exc.M], r.Ms, mode), customdata: exc.idx.map((oi) => [idx, oi]) }
+    : undefined;
+  const out = { loop, excl };
+  byKey.set(key, out);
+  return out;
 }
 
 function defaultLabels(mode: UnitMode): { x: string; y: string } {
@@ -57,7 +105,36 @@ const PAPER_COLORS: Record<PaperColorScheme, string[]> = {
   grayscale: ["#000000", "#555555", "#999999", "#222222", "#777777", "#AAAAAA", "#333333", "#BBBBBB"],
 };
 
-export default function Graph({ entries, unitMode, graphSettings, onToggleExclude }: Props) {
+// ── 配色テーマ（論文モード / 画面表示）。グリッド・ゼロ線の色は設定依存なので描画時に決める ──
+const PAPER_THEME = {
+  paperBg:    "white",
+  plotBg:     "white",
+  fontColor:  "#111111",
+  fontFamily: "Times New Roman, Palatino, Georgia, serif",
+  legendBg:   "rgba(255,255,255,0.9)",
+  legendBord: "#AAAAAA",
+  legendFont: "#111111",
+};
+const SCREEN_THEME: typeof PAPER_THEME = {
+  paperBg:    "transparent",
+  plotBg:     "#09090b",
+  fontColor:  "#a1a1aa",
+  fontFamily: "Arial, Helvetica, sans-serif",
+  legendBg:   "rgba(24,24,27,0.85)",
+  legendBord: "#3f3f46",
+  legendFont: "#d4d4d8",
+};
+
+// Plot に渡すオブジェクトは参照が変わらない限り Plotly.react が走らないため、固定値は外に置く。
+// サイズ追従は Graph 内の ResizeObserver だけで行う（responsive / useResizeHandler はウィンドウの
+// resize しか見ず、サイドバーの幅変更に追従しない。併用すると 1 回のリサイズで 2 度再描画される）
+const PLOT_CONFIG: Partial<Config> = { displaylogo: false };
+const PLOT_STYLE = { width: "100%", height: "100%" };
+
+// 描画データとレイアウトを組み立てる（entries / unitMode / graphSettings のみに依存）
+function buildFigure(
+  entries: FileEntry[], unitMode: UnitMode, graphSettings: GraphSettings,
+): { data: Data[]; layout: Partial<Layout> } {
   const hasData = entries.some((e) => e.result?.plot);
   const defs    = defaultLabels(unitMode);
   const xLabel  = texToDisplay(graphSettings.xLabelOverride || defs.x);
@@ -81,17 +158,18 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
 
   const paper = paperMode;
   const schemeColors = PAPER_COLORS[paperColorScheme];
+  // 配色・除外点マーカーはファイルに依らないので、ファイルごとのループの外で一度だけ決める
+  const useScheme = paper && paperColorScheme !== "current" && schemeColors.length > 0;
+  const colorOf = (e: FileEntry, idx: number) =>
+    useScheme ? schemeColors[idx % schemeColors.length] : e.color;
+  const exclMarker = {
+    color: "#9ca3af", size: Math.max(8, markerSize + 3), symbol: "x" as const, line: { width: 1, color: "#6b7280" },
+  };
 
   const theme = {
-    paperBg:    paper ? "white"    : "transparent",
-    plotBg:     paper ? "white"    : "#09090b",
-    fontColor:  paper ? "#111111"  : "#a1a1aa",
-    fontFamily: paper ? "Times New Roman, Palatino, Georgia, serif" : "Arial, Helvetica, sans-serif",
+    ...(paper ? PAPER_THEME : SCREEN_THEME),
     gridCol:    paper ? (showGrid ? "#CCCCCC" : "transparent") : (showGrid ? gridColor : "transparent"),
     zeroCol:    paper ? (showZeroLines ? "#777777" : "transparent") : (showZeroLines ? zeroLineColor : "transparent"),
-    legendBg:   paper ? "rgba(255,255,255,0.9)" : "rgba(24,24,27,0.85)",
-    legendBord: paper ? "#AAAAAA"  : "#3f3f46",
-    legendFont: paper ? "#111111"  : "#d4d4d8",
   };
 
   const plotMode = markerSize > 0 ? "lines+markers" : "lines";
@@ -100,20 +178,20 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
   const xRaw = toRange(xMin, xMax);
   const yRaw = toRange(yMin, yMax);
 
+  // 文字列の入力欄は描画ごとに一度だけ数値化し、範囲の拡張と目盛り設定で共用する
+  const dtickX = xDtick ? parseFloat(xDtick) : undefined;
+  const dtickY = yDtick ? parseFloat(yDtick) : undefined;
+
   // 論文モード: 境界値の目盛が枠の隅と重ならないようrangeを拡張
   // dtickの20%分広げることで境界目盛がフレーム端から明確に離れる
-  const padRange = (r: [number, number] | undefined, dtickStr: string): [number, number] | undefined => {
+  const padRange = (r: [number, number] | undefined, dtickVal: number | undefined): [number, number] | undefined => {
     if (!r) return undefined;
     const span = r[1] - r[0];
-    const dtickVal = dtickStr ? parseFloat(dtickStr) : NaN;
-    const pad  = !isNaN(dtickVal) && dtickVal > 0 ? dtickVal * 0.2 : span * 0.03;
+    const pad  = dtickVal !== undefined && !isNaN(dtickVal) && dtickVal > 0 ? dtickVal * 0.2 : span * 0.03;
     return [r[0] - pad, r[1] + pad];
   };
-  const xRange = paper ? padRange(xRaw, xDtick ?? "") : xRaw;
-  const yRange = paper ? padRange(yRaw, yDtick ?? "") : yRaw;
-
-  const dtickX = xDtick ? parseFloat(xDtick) : undefined;
-  const dtickY = yDtick ? parseFloat(yDtick) : undefined;
+  const xRange = paper ? padRange(xRaw, dtickX) : xRaw;
+  const yRange = paper ? padRange(yRaw, dtickY) : yRaw;
 
   // 補助目盛り設定（論文モード & showMinorTicks 時のみ）
   const buildMinor = (mainDtick: number | undefined) => {
@@ -135,18 +213,15 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
   const traces: Data[] = hasData
     ? entries.flatMap((e, idx): Data[] => {
         if (!e.result?.plot) return [];
-        const { H_down, M_down, H_up, M_up, idx_down, idx_up } = e.result.plot;
-        const { H, M } = convertAxes(
-          [...H_down, ...H_up], [...M_down, ...M_up], e.result.Ms, unitMode
-        );
-        const color = (paper && paperColorScheme !== "current" && schemeColors.length > 0)
-          ? schemeColors[idx % schemeColors.length]
-          : e.color;
+        const { loop, excl } = getPlotArrays(e.result, unitMode, idx);
+        const color = colorOf(e, idx);
         // 各点に [ファイル番号, 元データ行番号] を持たせ、クリックで除外/復帰できるようにする
-        const origIdx = [...(idx_down ?? []), ...(idx_up ?? [])];
-        const customdata = origIdx.length === H.length ? origIdx.map((oi) => [idx, oi]) : undefined;
+        const customdata = loop.customdata;
+        // ファイルごとに固定の uid。並べ替え・削除で順番が変わっても Plotly が前回と同じトレースとして対応付ける
+        const uid = fileKey(e.file);
         const out: Data[] = [{
-          x: H, y: M,
+          uid,
+          x: loop.H, y: loop.M,
           type: "scatter",
           mode: plotMode as "lines" | "lines+markers",
           name: texToDisplay(e.legendName || e.file.name.replace(/\.[^.]+$/, "")),
@@ -155,15 +230,14 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
           ...(customdata ? { customdata } : {}),
         }];
         // 除外点: 灰色×で表示（クリックで復帰）。showExcluded=false なら画面・エクスポート共に非表示
-        const exc = e.result.excluded;
-        if (exc && exc.idx.length > 0 && showExcluded) {
-          const conv = convertAxes(exc.H, exc.M, e.result.Ms, unitMode);
+        if (excl && showExcluded) {
           out.push({
-            x: conv.H, y: conv.M,
+            uid: `${uid}:excl`,
+            x: excl.H, y: excl.M,
             type: "scatter", mode: "markers",
             name: "除外点", showlegend: false,
-            marker: { color: "#9ca3af", size: Math.max(8, markerSize + 3), symbol: "x", line: { width: 1, color: "#6b7280" } },
-            customdata: exc.idx.map((oi) => [idx, oi]),
+            marker: exclMarker,
+            customdata: excl.customdata,
             hovertemplate: "除外点 (クリックで復帰)<extra></extra>",
           });
         }
@@ -192,9 +266,7 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
       if (!a || !e.result) return;
       const r = e.result;
       const Ms = r.Ms;
-      const color = (paper && paperColorScheme !== "current" && schemeColors.length > 0)
-        ? schemeColors[idx % schemeColors.length]
-        : e.color;
+      const color = colorOf(e, idx);
 
       // 物性値のテキストラベル
       const mkLabel = (
@@ -215,12 +287,14 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
       if (a.hc_down_T != null) { hcX.push(convHv(a.hc_down_T)); hcY.push(convMv(0, Ms)); }
       if (a.hc_up_T   != null) { hcX.push(convHv(a.hc_up_T));   hcY.push(convMv(0, Ms)); }
       if (hcX.length) annotTraces.push({
+        uid: `${fileKey(e.file)}:hc`,
         x: hcX, y: hcY, type: "scatter", mode: "markers",
         name: "Hc", showlegend: false, hoverinfo: "x",
         marker: { color, size: 12, symbol: "x-thin-open", line: { width: 2, color } },
       });
       // Mr 交点 (H=0)
       if (a.mr != null) annotTraces.push({
+        uid: `${fileKey(e.file)}:mr`,
         x: [convHv(0), convHv(0)], y: [convMv(a.mr, Ms), convMv(-a.mr, Ms)],
         type: "scatter", mode: "markers",
         name: "Mr", showlegend: false, hoverinfo: "y",
@@ -281,64 +355,121 @@ export default function Graph({ entries, unitMode, graphSettings, onToggleExclud
     }),
   };
 
+  return {
+    data: allTraces,
+    layout: {
+      paper_bgcolor: theme.paperBg,
+      plot_bgcolor:  theme.plotBg,
+      font: { color: theme.fontColor, family: theme.fontFamily, size: tickLabelSize },
+      showlegend: showLegend,
+      legend: {
+        bgcolor:       theme.legendBg,
+        bordercolor:   theme.legendBord,
+        borderwidth:   1,
+        font:          { size: legendFontSize, color: theme.legendFont, family: theme.fontFamily },
+        tracegroupgap: 4,
+        ncols:         legendColumns,
+        ...legendAnchor,
+      },
+      xaxis: {
+        title:          { text: xLabel, font: { size: Math.max(6, axisLabelSize), color: theme.fontColor, family: theme.fontFamily } },
+        tickfont:       { size: Math.max(6, tickLabelSize), color: theme.fontColor, family: theme.fontFamily },
+        showticklabels: true,
+        tickformat:     xTickFormat || undefined,
+        ...(dtickX !== undefined ? { dtick: dtickX, tickmode: "linear" as const, tick0: 0 } : {}),
+        ...(xRange ? { range: xRange } : {}),
+        ...axisBase,
+        ...buildMinor(dtickX),
+      },
+      yaxis: {
+        title:          { text: yLabel, font: { size: Math.max(6, axisLabelSize), color: theme.fontColor, family: theme.fontFamily } },
+        tickfont:       { size: Math.max(6, tickLabelSize), color: theme.fontColor, family: theme.fontFamily },
+        showticklabels: true,
+        tickformat:     yTickFormat || undefined,
+        ...(dtickY !== undefined ? { dtick: dtickY, tickmode: "linear" as const, tick0: 0 } : {}),
+        ...(yRange ? { range: yRange } : {}),
+        ...axisBase,
+        ...buildMinor(dtickY),
+      },
+      margin:      { t: 30, r: 40, b: marginB, l: marginL },
+      shapes:      annotShapes,
+      annotations: annotLabels,
+      autosize:    true,
+    },
+  };
+}
+
+// 図に現れるフィールドだけを比べる。解析中フラグ (loading) や計算設定の変更だけでは
+// 図は変わらないため、再解析の開始時にレイアウト計算ごと組み直さないようにする
+function sameFigureInputs(a: FileEntry[], b: FileEntry[]): boolean {
+  return a.length === b.length && a.every((e, i) => {
+    const o = b[i];
+    return e.result === o.result && e.file === o.file && e.color === o.color
+      && e.legendName === o.legendName && e.markerSymbol === o.markerSymbol
+      && e.showAnnot === o.showAnnot;
+  });
+}
+
+function Graph({ entries, unitMode, graphSettings, onToggleExclude }: Props) {
+  const figureEntries = useRef(entries);
+  if (!sameFigureInputs(figureEntries.current, entries)) figureEntries.current = entries;
+  // 表示設定（線幅・フォントサイズ等）の連続変更や解析結果の到着では、サイドバーの入力を先に反映し、
+  // 図の組み直しは低優先度で最新値に追いつかせる（途中の値での描画は React が打ち切り、
+  // 立て続けの変更は 1 回の Plotly.react にまとまる）
+  const plotEntries      = useDeferredValue(figureEntries.current);
+  const deferredUnit     = useDeferredValue(unitMode);
+  const deferredSettings = useDeferredValue(graphSettings);
+
+  // サイドバーのドラッグ等で親が再描画されても、グラフ関連の入力が同じなら再計算・再描画しない
+  const { data, layout } = useMemo(
+    () => buildFigure(plotEntries, deferredUnit, deferredSettings),
+    [plotEntries, deferredUnit, deferredSettings],
+  );
+
+  const handleClick = useCallback((ev: Readonly<PlotMouseEvent>) => {
+    const pt = ev.points?.[0] as { customdata?: unknown } | undefined;
+    const cd = pt?.customdata as [number, number] | undefined;
+    if (cd && onToggleExclude) onToggleExclude(cd[0], cd[1]);
+  }, [onToggleExclude]);
+
+  // グラフ枠の大きさが変わったら（初回表示・ウィンドウやサイドバーのリサイズ・折りたたみ）描き直す。
+  // 連続したリサイズは 1 フレームに 1 回にまとめる
+  const boxRef = useRef<HTMLDivElement>(null);
+  useEffect(() => {
+    const box = boxRef.current;
+    if (!box) return;
+    let frame = 0;
+    const observer = new ResizeObserver(() => {
+      cancelAnimationFrame(frame);
+      frame = requestAnimationFrame(() => {
+        const gd = box.querySelector<HTMLElement>(".js-plotly-plot");
+        if (gd && gd.offsetParent !== null) Plotly.Plots.resize(gd);
+      });
+    });
+    observer.observe(box);
+    return () => { cancelAnimationFrame(frame); observer.disconnect(); };
+  }, []);
+
+  const paper = deferredSettings.paperMode;
+
   return (
     <div className={`flex-1 flex items-stretch p-3 min-h-0 transition-colors duration-300 ${
       paper ? "bg-gray-300" : "bg-zinc-950"
     }`}>
-      <div className="relative flex-1"
+      <div ref={boxRef} className="relative flex-1"
         style={paper ? { background: "white", borderRadius: 2, boxShadow: "0 20px 60px rgba(0,0,0,0.5)" } : {}}>
         <Plot
           divId="vsm-main-plot"
-          data={allTraces}
-          onClick={(ev) => {
-            const pt = ev.points?.[0] as { customdata?: unknown } | undefined;
-            const cd = pt?.customdata as [number, number] | undefined;
-            if (cd && onToggleExclude) onToggleExclude(cd[0], cd[1]);
-          }}
-          layout={{
-            paper_bgcolor: theme.paperBg,
-            plot_bgcolor:  theme.plotBg,
-            font: { color: theme.fontColor, family: theme.fontFamily, size: tickLabelSize },
-            showlegend: showLegend,
-            legend: {
-              bgcolor:       theme.legendBg,
-              bordercolor:   theme.legendBord,
-              borderwidth:   1,
-              font:          { size: legendFontSize, color: theme.legendFont, family: theme.fontFamily },
-              tracegroupgap: 4,
-              ncols:         legendColumns,
-              ...legendAnchor,
-            },
-            xaxis: {
-              title:          { text: xLabel, font: { size: Math.max(6, axisLabelSize), color: theme.fontColor, family: theme.fontFamily } },
-              tickfont:       { size: Math.max(6, tickLabelSize), color: theme.fontColor, family: theme.fontFamily },
-              showticklabels: true,
-              tickformat:     xTickFormat || undefined,
-              ...(dtickX !== undefined ? { dtick: dtickX, tickmode: "linear" as const, tick0: 0 } : {}),
-              ...(xRange ? { range: xRange } : {}),
-              ...axisBase,
-              ...buildMinor(dtickX),
-            },
-            yaxis: {
-              title:          { text: yLabel, font: { size: Math.max(6, axisLabelSize), color: theme.fontColor, family: theme.fontFamily } },
-              tickfont:       { size: Math.max(6, tickLabelSize), color: theme.fontColor, family: theme.fontFamily },
-              showticklabels: true,
-              tickformat:     yTickFormat || undefined,
-              ...(dtickY !== undefined ? { dtick: dtickY, tickmode: "linear" as const, tick0: 0 } : {}),
-              ...(yRange ? { range: yRange } : {}),
-              ...axisBase,
-              ...buildMinor(dtickY),
-            },
-            margin:      { t: 30, r: 40, b: marginB, l: marginL },
-            shapes:      annotShapes,
-            annotations: annotLabels,
-            autosize:    true,
-          }}
-          useResizeHandler
-          style={{ width: "100%", height: "100%" }}
-          config={{ displaylogo: false, responsive: true }}
+          data={data}
+          onClick={handleClick}
+          onAfterPlot={notifyGraphRedraw}
+          layout={layout}
+          style={PLOT_STYLE}
+          config={PLOT_CONFIG}
         />
       </div>
     </div>
   );
 }
+
+export default memo(Graph);
@@ -1,9 +1,10 @@
-import { useEffect, useRef, useState } from "react";
+import { Activity, memo, useEffect, useMemo, useRef, useState } from "react";
 import { createPortal } from "react-dom";
 import type { FileEntry, UnitMode, GraphSettings, PaperColorScheme } from "../App";
 import type { AnalysisParams, FileCalcSettings, FileWithPath } from "../api/client";
 import { openVSMFiles } from "../api/client";
 import { searchSuggestions, getCurrentToken } from "../utils/legendSuggestions";
+import { fileKey } from "../utils/fileKey";
 import type { Suggestion } from "../utils/legendSuggestions";
 import ExportDialog from "./ExportDialog";
 
@@ -126,6 +127,39 @@ function Section({ title, children }: { title: string; children: React.ReactNode
   );
 }
 
+// 数値入力欄。キー入力中の文字列は手元の下書きに留め、Enter かフォーカス移動で確定したときだけ
+// onCommit を呼ぶ（"1." や "-" のような途中の値で再解析しない）。
+// スピンボタン・矢印キーによる増減は 1 操作で値が完結するので、その場で確定する
+function DraftNumberInput({ value, onCommit, ...rest }: {
+  value: string; onCommit: (text: string) => void;
+  step?: number; min?: number; placeholder?: string; className?: string;
+}) {
+  const [draft, setDraft] = useState<string | null>(null);
+  const commit = (text: string) => {
+    setDraft(null);
+    if (text !== value) onCommit(text);
+  };
+  return (
+    <input type="number" {...rest} value={draft ?? value}
+      onChange={(e) => {
+        const inputType = (e.nativeEvent as InputEvent).inputType ?? "";
+        if (/^(insert|delete)/.test(inputType)) setDraft(e.target.value);
+        else commit(e.target.value);
+      }}
+      onBlur={(e) => { if (draft !== null) commit(e.target.value); }}
+      onKeyDown={(e) => { if (e.key === "Enter" && draft !== null) commit(e.currentTarget.value); }}
+    />
+  );
+}
+
+// 確定した入力文字列を数値にする。数値として読めないか min を下回れば null を返し、
+// 呼び出し側は変更を送らない（解析は走らず、入力欄は元の値の表示に戻る）
+function parseCommitted(text: string, min?: number): number | null {
+  const v = parseFloat(text);
+  if (!Number.isFinite(v)) return null;
+  return min !== undefined && v < min ? null : v;
+}
+
 function NumberInput({ label, value, step = 1, min, onChange }: {
   label: string; value: number; step?: number; min?: number;
   onChange: (v: number) => void;
@@ -133,8 +167,8 @@ function NumberInput({ label, value, step = 1, min, onChange }: {
   return (
     <div className="mb-3">
       <label className="text-xs text-zinc-400 block mb-1">{label}</label>
-      <input type="number" value={value} step={step} min={min}
-        onChange={(e) => { const v = parseFloat(e.target.value); if (!isNaN(v)) onChange(v); }}
+      <DraftNumberInput value={String(value)} step={step} min={min}
+        onCommit={(text) => { const v = parseCommitted(text, min); if (v !== null) onChange(v); }}
         className="w-full bg-zinc-800 border border-zinc-700 text-zinc-100 text-sm rounded px-2 py-1.5 focus:outline-none focus:border-indigo-500"
       />
     </div>
@@ -194,14 +228,14 @@ function RangeInput({ label, min, max, onMinChange, onMaxChange, unit = "T" }: {
     <div className="mb-2">
       <label className="text-xs text-zinc-500 block mb-1">{label} ({unit})</label>
       <div className="flex items-center gap-1">
-        <input type="number" value={min} step={0.1}
-          onChange={(e) => onMinChange(e.target.value)}
+        <DraftNumberInput value={min} step={0.1}
+          onCommit={onMinChange}
           className="w-full bg-zinc-700/50 border border-zinc-600 text-zinc-100 text-xs rounded px-2 py-1 focus:outline-none focus:border-indigo-500"
           placeholder="下限"
         />
         <span className="text-zinc-600 text-xs shrink-0">～</span>
-        <input type="number" value={max} step={0.1}
-          onChange={(e) => onMaxChange(e.target.value)}
+        <DraftNumberInput value={max} step={0.1}
+          onCommit={onMaxChange}
           className="w-full bg-zinc-700/50 border border-zinc-600 text-zinc-100 text-xs rounded px-2 py-1 focus:outline-none focus:border-indigo-500"
           placeholder="上限"
         />
@@ -221,17 +255,26 @@ const MARKER_OPTIONS = [
   { value: "x",          label: "× バツ" },
 ];
 
-function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcChange, onRemove, onMove }: {
+// 行ごとのコールバックは親から (index, ...) 形式のまま受け取り、memo で比較できるようにする。
+// ファイル数が多くても、変更のあった行だけが再描画される
+const FileEntryItem = memo(function FileEntryItem({
+  entry, index, total, params, onEntryDisplayChange, onEntryCalcChange, onEntryRemove, onEntryMove,
+}: {
   entry:          FileEntry;
   index:          number;
   total:          number;
   params:         AnalysisParams;
-  onDisplayChange: (patch: Partial<Pick<FileEntry, "legendName" | "color" | "markerSymbol" | "showAnnot">>) => void;
-  onCalcChange:   (patch: Partial<FileCalcSettings>) => void;
-  onRemove:       () => void;
-  onMove:         (dir: -1 | 1) => void;
+  onEntryDisplayChange: (index: number, patch: Partial<Pick<FileEntry, "legendName" | "color" | "markerSymbol" | "showAnnot">>) => void;
+  onEntryCalcChange:    (index: number, patch: Partial<FileCalcSettings>) => void;
+  onEntryRemove:        (index: number) => void;
+  onEntryMove:          (from: number, to: number) => void;
 }) {
   const [expanded, setExpanded] = useState(false);
+  const onDisplayChange = (patch: Partial<Pick<FileEntry, "legendName" | "color" | "markerSymbol" | "showAnnot">>) =>
+    onEntryDisplayChange(index, patch);
+  const onCalcChange = (patch: Partial<FileCalcSettings>) => onEntryCalcChange(index, patch);
+  const onRemove = () => onEntryRemove(index);
+  const onMove   = (dir: -1 | 1) => onEntryMove(index, index + dir);
   const s = entry.calcSettings ?? {};
 
   const demagMode = s.perDemagMode ?? "";   // "" = グローバル設定
@@ -244,23 +287,27 @@ function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcCha
 
   // 反磁性補正範囲連動: 正側が変わったら負側を自動ミラー
   const setDemagPosMin = (v: string) => {
-    const n = parseFloat(v) || 0.5;
+    const n = parseCommitted(v);
+    if (n === null) return;
     onCalcChange({ demagPosMin: n, ...(demagLink ? { demagNegMax: -n } : {}) });
   };
   const setDemagPosMax = (v: string) => {
-    const n = parseFloat(v) || 2.0;
+    const n = parseCommitted(v);
+    if (n === null) return;
     onCalcChange({ demagPosMax: n, ...(demagLink ? { demagNegMin: -n } : {}) });
   };
 
-  // Ms範囲連動: 正側が変わったら負側も反転して更新
+  // Ms範囲連動: 反磁性補正範囲と同じく、正側の下限/上限を負側の上限/下限へ反転して映す
+  // （正側と負側は 1 回の変更としてまとめて渡し、変わった境界の相方だけを書き換える）
   const setMsPosMin = (v: string) => {
-    onCalcChange({ msPosMin: parseFloat(v) || 0 });
-    if (msLink) onCalcChange({ msNegMin: -(parseFloat(v) || 0) });
+    const n = parseCommitted(v);
+    if (n === null) return;
+    onCalcChange({ msPosMin: n, ...(msLink ? { msNegMax: -n } : {}) });
   };
   const setMsPosMax = (v: string) => {
-    const n = parseFloat(v) || 0;
-    onCalcChange({ msPosMax: n });
-    if (msLink) onCalcChange({ msNegMax: -Math.abs(s.msPosMin ?? 0.5), msNegMin: -n });
+    const n = parseCommitted(v);
+    if (n === null) return;
+    onCalcChange({ msPosMax: n, ...(msLink ? { msNegMin: -n } : {}) });
   };
 
   return (
@@ -354,24 +401,27 @@ function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcCha
             <div className="grid grid-cols-2 gap-2">
               <div>
                 <label className="text-xs text-zinc-500 block mb-1">膜厚 (nm)</label>
-                <input type="number" min={0.1} step={1}
+                <DraftNumberInput min={0.1} step={1}
                   placeholder={String(params.thickness)}
-                  value={s.thickness ?? ""}
-                  onChange={(e) => {
-                    const v = parseFloat(e.target.value);
-                    onCalcChange({ thickness: isNaN(v) ? undefined : v });
+                  value={String(s.thickness ?? "")}
+                  onCommit={(text) => {
+                    // 空欄はグローバル設定に戻す。0 以下など不正な値は反映しない（体積が 0 以下になる）
+                    if (text.trim() === "") { onCalcChange({ thickness: undefined }); return; }
+                    const v = parseCommitted(text, 0.1);
+                    if (v !== null) onCalcChange({ thickness: v });
                   }}
                   className="w-full bg-zinc-700/50 border border-zinc-600 text-zinc-100 text-xs rounded px-2 py-1 focus:outline-none focus:border-indigo-500 placeholder:text-zinc-600"
                 />
               </div>
               <div>
                 <label className="text-xs text-zinc-500 block mb-1">面積 (mm²)</label>
-                <input type="number" min={0.1} step={1}
+                <DraftNumberInput min={0.1} step={1}
                   placeholder={String(params.area)}
-                  value={s.area ?? ""}
-                  onChange={(e) => {
-                    const v = parseFloat(e.target.value);
-                    onCalcChange({ area: isNaN(v) ? undefined : v });
+                  value={String(s.area ?? "")}
+                  onCommit={(text) => {
+                    if (text.trim() === "") { onCalcChange({ area: undefined }); return; }
+                    const v = parseCommitted(text, 0.1);
+                    if (v !== null) onCalcChange({ area: v });
                   }}
                   className="w-full bg-zinc-700/50 border border-zinc-600 text-zinc-100 text-xs rounded px-2 py-1 focus:outline-none focus:border-indigo-500 placeholder:text-zinc-600"
                 />
@@ -430,8 +480,8 @@ function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcCha
                   <span>{demagLink ? "負側を連動" : "独立設定"}</span>
                 </button>
                 <RangeInput label="負側" min={String(s.demagNegMin ?? -2.0)} max={String(s.demagNegMax ?? -0.5)}
-                  onMinChange={(v) => onCalcChange({ demagNegMin: parseFloat(v) || -2.0 })}
-                  onMaxChange={(v) => onCalcChange({ demagNegMax: parseFloat(v) || -0.5 })}
+                  onMinChange={(v) => { const n = parseCommitted(v); if (n !== null) onCalcChange({ demagNegMin: n }); }}
+                  onMaxChange={(v) => { const n = parseCommitted(v); if (n !== null) onCalcChange({ demagNegMax: n }); }}
                 />
               </div>
             )}
@@ -456,8 +506,8 @@ function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcCha
                   onMaxChange={setMsPosMax}
                 />
                 <RangeInput label="負側" min={String(s.msNegMin ?? -2.0)} max={String(s.msNegMax ?? -0.5)}
-                  onMinChange={(v) => onCalcChange({ msNegMin: parseFloat(v) || -2.0 })}
-                  onMaxChange={(v) => onCalcChange({ msNegMax: parseFloat(v) || -0.5 })}
+                  onMinChange={(v) => { const n = parseCommitted(v); if (n !== null) onCalcChange({ msNegMin: n }); }}
+                  onMaxChange={(v) => { const n = parseCommitted(v); if (n !== null) onCalcChange({ msNegMax: n }); }}
                 />
                 <label className="flex items-center gap-1.5 text-xs text-zinc-500 cursor-pointer mt-1">
                   <input type="checkbox" checked={msLink}
@@ -474,10 +524,10 @@ function FileEntryItem({ entry, index, total, params, onDisplayChange, onCalcCha
       )}
     </li>
   );
-}
+});
 
 // ── 解析タブ ──────────────────────────
-function AnalysisTab({ entries, params, unitMode, onLoadFiles, onAddFiles, onClearAll,
+const AnalysisTab = memo(function AnalysisTab({ entries, params, unitMode, onLoadFiles, onAddFiles, onClearAll,
   onParamsChange, onUnitModeChange, onEntryDisplayChange, onEntryCalcChange, onEntryRemove, onEntryMove,
   onApplyFirstToAll }: {
   entries: FileEntry[]; params: AnalysisParams; unitMode: UnitMode;
@@ -513,11 +563,11 @@ function AnalysisTab({ entries, params, unitMode, onLoadFiles, onAddFiles, onCle
         <Section title={`読み込み済み (${entries.length} ファイル)`}>
           <ul className="space-y-2">
             {entries.map((e, i) => (
-              <FileEntryItem key={i} entry={e} index={i} total={entries.length} params={params}
-                onDisplayChange={(p) => onEntryDisplayChange(i, p)}
-                onCalcChange={(p) => onEntryCalcChange(i, p)}
-                onRemove={() => onEntryRemove(i)}
-                onMove={(dir) => onEntryMove(i, i + dir)}
+              <FileEntryItem key={fileKey(e.file)} entry={e} index={i} total={entries.length} params={params}
+                onEntryDisplayChange={onEntryDisplayChange}
+                onEntryCalcChange={onEntryCalcChange}
+                onEntryRemove={onEntryRemove}
+                onEntryMove={onEntryMove}
               />
             ))}
           </ul>
@@ -568,7 +618,7 @@ function AnalysisTab({ entries, params, unitMode, onLoadFiles, onAddFiles, onCle
       </Section>
     </div>
   );
-}
+});
 
 // ── グラフタブ用ヘルパー ──────────────────────────────────────
 
@@ -983,7 +1033,7 @@ function AxisPanel({ g, ch }: { g: GraphSettings; ch: (p: Partial<GraphSettings>
 }
 
 // ── グラフ設定タブ ──────────────────────────
-function GraphTab({ graphSettings, onChange }: { graphSettings: GraphSettings; onChange: (next: Partial<GraphSettings>) => void }) {
+const GraphTab = memo(function GraphTab({ graphSettings, onChange }: { graphSettings: GraphSettings; onChange: (next: Partial<GraphSettings>) => void }) {
   const [sub, setSub] = useState<"basic" | "axis">("basic");
 
   return (
@@ -1009,10 +1059,10 @@ function GraphTab({ graphSettings, onChange }: { graphSettings: GraphSettings; o
       </div>
     </div>
   );
-}
+});
 
 // ── 保存タブ ──────────────────────────
-function SaveTab({ onSave, onLoad, hasEntries }: {
+const SaveTab = memo(function SaveTab({ onSave, onLoad, hasEntries }: {
   onSave: () => Promise<boolean>; onLoad: () => void; hasEntries: boolean;
 }) {
   const [showExport, setShowExport] = useState(false);
@@ -1043,7 +1093,7 @@ function SaveTab({ onSave, onLoad, hasEntries }: {
       </Section>
     </div>
   );
-}
+});
 
 // ── ログタブ用定数 ────────────────────────────────────────────
 const META_DISPLAY: { key: string; label: string }[] = [
@@ -1081,10 +1131,59 @@ const CORRECTION_LABELS: Record<string, string> = {
 };
 
 // ── ログタブ ──────────────────────────
-function LogTab({ entries }: { entries: FileEntry[] }) {
+// ── ログ行の色分け ──
+function logLineClass(line: string): string {
+  if (/^---/.test(line))                                        return "text-zinc-200 font-semibold";
+  if (/警告|warn/i.test(line))                                  return "text-amber-400";
+  if (/エラー|error/i.test(line))                               return "text-red-400";
+  if (/R²/.test(line) || /[Mm]s=|[Mm]r=|[Hh]c=|[Hh]s=/.test(line)) return "text-cyan-300";
+  if (/補正|correction/i.test(line))                            return "text-emerald-300";
+  return "text-zinc-400";
+}
+
+const NO_LOGS: string[] = [];
+
+// 測定情報の表示用サマリ。メタデータはファイルごとに不変なので、LogTab では結果単位でメモ化する
+function summarizeMetadata(meta: Record<string, string>) {
+  // 表示すべき重要フィールド（0・空・デフォルト値を除外）
+  const displayMeta = META_DISPLAY
+    .map(({ key, label }) => ({ label, value: meta[key] }))
+    .filter(({ value }) => value != null && value !== "0" && value !== "");
+
+  // 補正フラグのサマリ
+  const activeCorrections = CORRECTION_KEYS
+    .filter((k) => meta[k]?.toUpperCase() === "YES")
+    .map((k) => CORRECTION_LABELS[k]);
+  const correctionPresent = CORRECTION_KEYS.some((k) => k in meta);
+  return { displayMeta, activeCorrections, correctionPresent };
+}
+
+const LogTab = memo(function LogTab({ entries }: { entries: FileEntry[] }) {
   const [selectedIndex, setSelectedIndex] = useState<number>(0);
   const [logFilter,     setLogFilter]     = useState("");
 
+  const idx    = Math.min(selectedIndex, Math.max(0, entries.length - 1));
+  const target = entries[idx] ?? entries[0];
+  const result = target?.result;
+  const logs   = result?.logs ?? NO_LOGS;
+
+  // ログは解析結果ごとに不変なので、行の色分けと R² 抽出は結果が変わったときだけ行う
+  // （絞り込み入力や他ファイルの再解析のたびに全行へ正規表現をかけ直さない）
+  const classified = useMemo(
+    () => logs.map((line) => ({ line, cls: logLineClass(line) })),
+    [logs],
+  );
+  const [r2Pos, r2Neg] = useMemo<[number | null, number | null]>(() => {
+    const m = logs.join("\n").match(/R²=\[正\s*([\d.]+),\s*負\s*([\d.]+)\]/);
+    return m ? [parseFloat(m[1]), parseFloat(m[2])] : [null, null];
+  }, [logs]);
+
+  const meta = result?.metadata;
+  const { displayMeta, activeCorrections, correctionPresent } = useMemo(
+    () => summarizeMetadata(meta ?? {}),
+    [meta],
+  );
+
   if (entries.length === 0) {
     return (
       <div className="flex-1 flex items-center justify-center">
@@ -1093,48 +1192,17 @@ function LogTab({ entries }: { entries: FileEntry[] }) {
     );
   }
 
-  const idx    = Math.min(selectedIndex, Math.max(0, entries.length - 1));
-  const target = entries[idx] ?? entries[0];
-  const result = target?.result;
-  const logs   = result?.logs ?? [];
-
-
-  // ── ログ行の色分け ──
-  const logLineClass = (line: string): string => {
-    if (/^---/.test(line))                                        return "text-zinc-200 font-semibold";
-    if (/警告|warn/i.test(line))                                  return "text-amber-400";
-    if (/エラー|error/i.test(line))                               return "text-red-400";
-    if (/R²/.test(line) || /[Mm]s=|[Mm]r=|[Hh]c=|[Hh]s=/.test(line)) return "text-cyan-300";
-    if (/補正|correction/i.test(line))                            return "text-emerald-300";
-    return "text-zinc-400";
-  };
-
-  // ── ログからR²抽出 / slopeはAPIフィールドを直接使用 ──
-  const logText = logs.join("\n");
-  const r2Match = logText.match(/R²=\[正\s*([\d.]+),\s*負\s*([\d.]+)\]/);
-  const r2Pos   = r2Match ? parseFloat(r2Match[1]) : null;
-  const r2Neg   = r2Match ? parseFloat(r2Match[2]) : null;
+  // ── slopeはAPIフィールドを直接使用 ──
   const slope   = result?.demag_slope ?? null;
 
   const r2Color = (v: number | null) =>
     v === null ? "text-zinc-500" : v >= 0.9995 ? "text-emerald-400" : v >= 0.999 ? "text-yellow-400" : "text-red-400";
 
   // ── フィルター済みリスト ──
-  const filteredLogs = logFilter
-    ? logs.filter((l) => l.toLowerCase().includes(logFilter.toLowerCase()))
-    : logs;
-  const meta = result?.metadata ?? {};
-
-  // 表示すべき重要フィールド（0・空・デフォルト値を除外）
-  const displayMeta = META_DISPLAY
-    .map(({ key, label }) => ({ label, value: meta[key] }))
-    .filter(({ value }) => value != null && value !== "0" && value !== "");
-
-  // 補正フラグのサマリ
-  const activeCorrections = CORRECTION_KEYS
-    .filter((k) => meta[k]?.toUpperCase() === "YES")
-    .map((k) => CORRECTION_LABELS[k]);
-  const correctionPresent = CORRECTION_KEYS.some((k) => k in meta);
+  const needle = logFilter.toLowerCase();
+  const filteredLogs = needle
+    ? classified.filter(({ line }) => line.toLowerCase().includes(needle))
+    : classified;
 
   const copyLog  = () => navigator.clipboard.writeText(logs.join("\n"));
   const copyMeta = () =>
@@ -1274,16 +1342,14 @@ function LogTab({ entries }: { entries: FileEntry[] }) {
           )}
           {filteredLogs.length > 0 ? (
             <div className="space-y-0.5 font-mono text-[10px] leading-relaxed">
-              {filteredLogs.map((line, i) => (
-                <p key={i} className={`${logLineClass(line)} whitespace-pre-wrap break-all`}>{line}</p>
+              {filteredLogs.map(({ line, cls }, i) => (
+                <p key={i} className={`${cls} whitespace-pre-wrap break-all`}>{line}</p>
               ))}
               {logFilter && filteredLogs.length === 0 && (
                 <p className="text-zinc-600">「{logFilter}」に一致しません</p>
               )}
             </div>
-          ) : !logFilter && target.error ? (
-            <p className="text-[10px] text-red-400">{target.error}</p>
-          ) : !logFilter ? (
+          ) : !logFilter && !target.error ? (
             <p className="text-[10px] text-zinc-600">ログなし</p>
           ) : null}
         </div>
@@ -1291,9 +1357,49 @@ function LogTab({ entries }: { entries: FileEntry[] }) {
       </div>
     </div>
   );
-}
+});
 
 // ── メイン Sidebar ──────────────────────────
+// タブ定義（アイコンの JSX も含め不変なので、描画ごとに作り直さないようモジュールに置く）
+const TABS: { id: Tab; label: string; icon: React.ReactNode }[] = [
+  {
+    id: "analysis", label: "解析",
+    icon: (
+      <svg viewBox="0 0 14 10" width="13" height="10" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
+        <polyline points="0,5 2,5 3,1 4.5,9 6,3 7.5,7 9,5 14,5" />
+      </svg>
+    ),
+  },
+  {
+    id: "graph", label: "グラフ",
+    icon: (
+      <svg viewBox="0 0 14 12" width="13" height="11" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
+        <polyline points="1,10 5,5 9,7 13,2" />
+        <line x1="1" y1="11.5" x2="13" y2="11.5" strokeOpacity="0.5" />
+      </svg>
+    ),
+  },
+  {
+    id: "save", label: "保存",
+    icon: (
+      <svg viewBox="0 0 14 14" width="12" height="12" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
+        <path d="M7 1v8M4 6l3 3 3-3" />
+        <path d="M1 11v2h12v-2" />
+      </svg>
+    ),
+  },
+  {
+    id: "log", label: "ログ",
+    icon: (
+      <svg viewBox="0 0 14 14" width="12" height="12" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
+        <rect x="2" y="1" width="10" height="12" rx="1" />
+        <line x1="5" y1="5" x2="9" y2="5" />
+        <line x1="5" y1="8" x2="9" y2="8" />
+      </svg>
+    ),
+  },
+];
+
 export default function Sidebar({
   style,
   entries, params, unitMode, graphSettings,
@@ -1303,52 +1409,22 @@ export default function Sidebar({
   onApplyFirstToAll, onSaveSession, onLoadSession,
 }: Props) {
   const [activeTab, setActiveTab] = useState<Tab>("analysis");
-
-  const TABS: { id: Tab; label: string; icon: React.ReactNode }[] = [
-    {
-      id: "analysis", label: "解析",
-      icon: (
-        <svg viewBox="0 0 14 10" width="13" height="10" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
-          <polyline points="0,5 2,5 3,1 4.5,9 6,3 7.5,7 9,5 14,5" />
-        </svg>
-      ),
-    },
-    {
-      id: "graph", label: "グラフ",
-      icon: (
-        <svg viewBox="0 0 14 12" width="13" height="11" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
-          <polyline points="1,10 5,5 9,7 13,2" />
-          <line x1="1" y1="11.5" x2="13" y2="11.5" strokeOpacity="0.5" />
-        </svg>
-      ),
-    },
-    {
-      id: "save", label: "保存",
-      icon: (
-        <svg viewBox="0 0 14 14" width="12" height="12" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
-          <path d="M7 1v8M4 6l3 3 3-3" />
-          <path d="M1 11v2h12v-2" />
-        </svg>
-      ),
-    },
-    {
-      id: "log", label: "ログ",
-      icon: (
-        <svg viewBox="0 0 14 14" width="12" height="12" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinejoin="round" strokeLinecap="round">
-          <rect x="2" y="1" width="10" height="12" rx="1" />
-          <line x1="5" y1="5" x2="9" y2="5" />
-          <line x1="5" y1="8" x2="9" y2="8" />
-        </svg>
-      ),
-    },
-  ];
+  // 一度開いたタブは破棄せず非表示にするだけにする（切り替えのたびに全ファイル行などを作り直さず、
+  // 開閉状態も残る）。非表示のタブは Activity により更新が後回しになり、
+  // ファイル読み込みや再解析の結果が届いても表示中のタブの描画を待たせない
+  const [mountedTabs, setMountedTabs] = useState<ReadonlySet<Tab>>(() => new Set<Tab>(["analysis"]));
+  const openTab = (id: Tab) => {
+    setActiveTab(id);
+    setMountedTabs((cur) => cur.has(id) ? cur : new Set(cur).add(id));
+  };
+  const mode = (id: Tab): "visible" | "hidden" => (activeTab === id ? "visible" : "hidden");
 
   return (
     <aside className="shrink-0 bg-zinc-900 flex flex-col overflow-hidden" style={style}>
 
       <div className="flex border-b border-zinc-800 shrink-0">
         {TABS.map((tab) => (
-          <button key={tab.id} onClick={() => setActiveTab(tab.id)}
+          <button key={tab.id} onClick={() => openTab(tab.id)}
             className={`flex-1 py-2 text-[10px] font-medium transition-colors flex flex-col items-center gap-0.5 ${
               activeTab === tab.id
                 ? "text-indigo-400 border-b-2 border-indigo-500"
@@ -1360,25 +1436,35 @@ export default function Sidebar({
         ))}
       </div>
 
-      {activeTab === "analysis" && (
-        <AnalysisTab
-          entries={entries} params={params} unitMode={unitMode}
-          onLoadFiles={onLoadFiles} onAddFiles={onAddFiles} onClearAll={onClearAll}
-          onParamsChange={onParamsChange} onUnitModeChange={onUnitModeChange}
-          onEntryDisplayChange={onEntryDisplayChange}
-          onEntryCalcChange={onEntryCalcChange}
-          onEntryRemove={onEntryRemove}
-          onEntryMove={onEntryMove}
-          onApplyFirstToAll={onApplyFirstToAll}
-        />
+      {mountedTabs.has("analysis") && (
+        <Activity mode={mode("analysis")}>
+          <AnalysisTab
+            entries={entries} params={params} unitMode={unitMode}
+            onLoadFiles={onLoadFiles} onAddFiles={onAddFiles} onClearAll={onClearAll}
+            onParamsChange={onParamsChange} onUnitModeChange={onUnitModeChange}
+            onEntryDisplayChange={onEntryDisplayChange}
+            onEntryCalcChange={onEntryCalcChange}
+            onEntryRemove={onEntryRemove}
+            onEntryMove={onEntryMove}
+            onApplyFirstToAll={onApplyFirstToAll}
+          />
+        </Activity>
+      )}
+      {mountedTabs.has("graph") && (
+        <Activity mode={mode("graph")}>
+          <GraphTab graphSettings={graphSettings} onChange={onGraphSettingsChange} />
+        </Activity>
       )}
-      {activeTab === "graph" && (
-        <GraphTab graphSettings={graphSettings} onChange={onGraphSettingsChange} />
+      {mountedTabs.has("save") && (
+        <Activity mode={mode("save")}>
+          <SaveTab onSave={onSaveSession} onLoad={onLoadSession} hasEntries={entries.length > 0} />
+        </Activity>
       )}
-      {activeTab === "save" && (
-        <SaveTab onSave={onSaveSession} onLoad={onLoadSession} hasEntries={entries.length > 0} />
+      {mountedTabs.has("log") && (
+        <Activity mode={mode("log")}>
+          <LogTab entries={entries} />
+        </Activity>
       )}
-      {activeTab === "log"  && <LogTab entries={entries} />}
     </aside>
   );
 }
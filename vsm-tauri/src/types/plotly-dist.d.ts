@@ -0,0 +1,5 @@
+// react-plotly.js が内部で使う Plotly 本体。同じモジュールを参照して Plotly を二重にバンドルしない
+declare module "plotly.js/dist/plotly" {
+  import * as Plotly from "plotly.js";
+  export default Plotly;
+}
@@ -0,0 +1,11 @@
+// 読み込んだ File ごとの固定 ID。並べ替え・削除で位置が変わっても同じファイルには同じ値を返すため、
+// React の key や Plotly のトレース uid に使う
+
+const keys = new WeakMap<File, string>();
+let nextKey = 0;
+
+export function fileKey(file: File): string {
+  let key = keys.get(file);
+  if (key === undefined) { key = `f${nextKey++}`; keys.set(file, key); }
+  return key;
+}
@@ -21,12 +21,22 @@ function getContainer(): HTMLElement {
   return el;
 }
 
+/** 出力サイズに依存しない、グラフ表示の合成 SVG。width / height はソース（画面上）のサイズ */
+export interface GraphSnapshot {
+  svg:    SVGSVGElement;
+  width:  number;
+  height: number;
+}
+
 /**
- * Plotly が描画する全 .main-svg を重ね合わせた合成 SVG 文字列を返す。
+ * Plotly が描画する全 .main-svg を重ね合わせた合成 SVG を作る。
  * infolayer（軸タイトル・凡例）は 2 枚目の SVG にあるため、
  * querySelectorAll で全て取得して 1 枚に合成する。
+ * DOM の複製とレイアウト問い合わせはここで一度だけ行い、出力サイズごとの文字列化は serializeAt に任せる
+ * （出力ダイアログではサイズ変更のプレビューで同じスナップショットを使い回す）。
  */
-function buildCompositeSvg(container: HTMLElement, outW: number, outH: number): string {
+export function snapshotGraph(): GraphSnapshot {
+  const container = getContainer();
   const cRect = container.getBoundingClientRect();
   const srcW  = cRect.width  || 800;
   const srcH  = cRect.height || 600;
@@ -37,8 +47,6 @@ function buildCompositeSvg(container: HTMLElement, outW: number, outH: number):
   const root = document.createElementNS(NS, "svg") as SVGSVGElement;
   root.setAttribute("xmlns",       NS);
   root.setAttribute("xmlns:xlink", "http://www.w3.org/1999/xlink");
-  root.setAttribute("width",       String(outW));
-  root.setAttribute("height",      String(outH));
   root.setAttribute("viewBox",     `0 0 ${srcW} ${srcH}`);
 
   // 白背景
@@ -58,13 +66,20 @@ function buildCompositeSvg(container: HTMLElement, outW: number, outH: number):
       g.setAttribute("transform", `translate(${dx.toFixed(1)},${dy.toFixed(1)})`);
     }
 
-    // SVG の子ノードをクローンして g に追加
+    // SVG の子ノードをクローンし、1 回の append でまとめて g に移す
     const clone = svg.cloneNode(true) as SVGSVGElement;
-    Array.from(clone.childNodes).forEach(n => g.appendChild(n));
+    g.append(...clone.childNodes);
     root.appendChild(g);
   }
 
-  return new XMLSerializer().serializeToString(root);
+  return { svg: root, width: srcW, height: srcH };
+}
+
+/** スナップショットを指定の出力サイズの SVG 文字列にする */
+function serializeAt(snap: GraphSnapshot, outW: number, outH: number): string {
+  snap.svg.setAttribute("width",  String(outW));
+  snap.svg.setAttribute("height", String(outH));
+  return new XMLSerializer().serializeToString(snap.svg);
 }
 
 /** SVG 文字列 → Canvas → PNG/JPEG Blob
@@ -102,13 +117,27 @@ function svgToCanvasBlob(
   });
 }
 
-export async function exportGraphBlob(opts: ExportOptions): Promise<Blob> {
-  const container = getContainer();
-  const cRect     = container.getBoundingClientRect();
-  const outW = opts.useCustomSize && opts.width  > 0 ? opts.width  : Math.round((cRect.width  || 800) * opts.scale);
-  const outH = opts.useCustomSize && opts.height > 0 ? opts.height : Math.round((cRect.height || 600) * opts.scale);
+// グラフの描き直しを待つ購読者。Graph の onAfterPlot から通知するので、グラフが遅延読み込みの
+// 途中でも、ファイルの全削除・再読み込みでグラフ要素が作り直されても購読は切れない
+const redrawListeners = new Set<() => void>();
 
-  const svgStr = buildCompositeSvg(container, outW, outH);
+/** グラフが描き直された（plotly_afterplot）ことを購読者に知らせる。Graph の onAfterPlot に渡す */
+export function notifyGraphRedraw(): void {
+  redrawListeners.forEach((cb) => cb());
+}
+
+/** グラフが描き直されるたびに callback を呼ぶ。戻り値は購読解除関数 */
+export function onGraphRedraw(callback: () => void): () => void {
+  redrawListeners.add(callback);
+  return () => { redrawListeners.delete(callback); };
+}
+
+export async function exportGraphBlob(opts: ExportOptions, snap?: GraphSnapshot): Promise<Blob> {
+  const s    = snap ?? snapshotGraph();
+  const outW = opts.useCustomSize && opts.width  > 0 ? opts.width  : Math.round(s.width  * opts.scale);
+  const outH = opts.useCustomSize && opts.height > 0 ? opts.height : Math.round(s.height * opts.scale);
+
+  const svgStr = serializeAt(s, outW, outH);
 
   if (opts.format === "svg") {
     return new Blob([svgStr], { type: "image/svg+xml;charset=utf-8" });
@@ -140,21 +169,20 @@ export async function exportGraphBlob(opts: ExportOptions): Promise<Blob> {
 }
 
 /** プレビュー用: 合成 SVG の blob URL を返す（PNG より高速） */
-export async function getPreviewUrl(outW: number, outH: number): Promise<string> {
-  const container = getContainer();
+export async function getPreviewUrl(outW: number, outH: number, snap?: GraphSnapshot): Promise<string> {
   // プレビューは 700px に縮小
   const scale = Math.min(1, 700 / Math.max(outW, outH, 1));
-  const svgStr = buildCompositeSvg(container, Math.round(outW * scale), Math.round(outH * scale));
+  const svgStr = serializeAt(snap ?? snapshotGraph(), Math.round(outW * scale), Math.round(outH * scale));
   const blob   = new Blob([svgStr], { type: "image/svg+xml;charset=utf-8" });
   return URL.createObjectURL(blob);
 }
 
 /** 保存したら true、キャンセルなら false */
-export async function downloadGraphImage(opts: ExportOptions): Promise<boolean> {
+export async function downloadGraphImage(opts: ExportOptions, snap?: GraphSnapshot): Promise<boolean> {
   // 1) グラフを Blob に変換
   let blob: Blob;
   try {
-    blob = await exportGraphBlob(opts);
+    blob = await exportGraphBlob(opts, snap);
   } catch (e) {
     throw new Error(`グラフ変換失敗: ${(e as Error).message}`);
   }
@@ -185,13 +213,13 @@ export async function downloadGraphImage(opts: ExportOptions): Promise<boolean>
 }
 
 export async function copyGraphToClipboard(
-  scale = 2, width?: number, height?: number,
+  scale = 2, width?: number, height?: number, snap?: GraphSnapshot,
 ): Promise<void> {
   const blob = await exportGraphBlob({
     format: "png", scale,
     useCustomSize: !!(width && height),
     width:  width  ?? 0,
     height: height ?? 0,
-  });
+  }, snap);
   await navigator.clipboard.write([new ClipboardItem({ "image/png": blob })]);
 }